@@ -0,0 +1,215 @@
+from datetime import datetime, timedelta
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from models import db, Booking, ParkingLot, ParkingSpot, User
+from rollups import record_closed_booking
+from database import retry_on_conflict
+from billing import current_tariff
+from occupancy import stage_occupancy
+from lot_cache import forget_lot_availability
+from user_summary import forget_user_summary
+
+RESERVATION_HOLD = timedelta(minutes=30)
+
+class AllocationError(Exception):
+    def __init__(self, message, errors=None):
+        super().__init__(message)
+        self.errors = errors or []
+
+def held_spots(now, reservation_id=None):
+    query = db.select(Booking.parking_spot_id).where(
+        Booking.status == 'reserved', Booking.reserved_until > now, Booking.booking_time < now + RESERVATION_HOLD
+    )
+    if reservation_id is not None:
+        query = query.where(Booking.id != reservation_id)
+    return query
+
+def claim_spot(lot_id, spot_id=None, attempts=5, reservation_id=None):
+    not_held = ParkingSpot.id.not_in(held_spots(datetime.utcnow(), reservation_id))
+    for _ in range(attempts):
+        candidate_id = spot_id
+        if candidate_id is None:
+            candidate_id = db.session.execute(
+                db.select(ParkingSpot.id)
+                .where(ParkingSpot.parking_lot_id == lot_id, ParkingSpot.is_occupied == False, not_held)
+                .order_by(ParkingSpot.id)
+                .limit(1)
+            ).scalar()
+            if candidate_id is None:
+                return None
+        claimed = db.session.execute(
+            db.update(ParkingSpot)
+            .where(
+                ParkingSpot.id == candidate_id,
+                ParkingSpot.parking_lot_id == lot_id,
+                ParkingSpot.is_occupied == False,
+                not_held
+            )
+            .values(is_occupied=True)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if claimed:
+            db.session.execute(
+                db.update(ParkingLot)
+                .where(ParkingLot.id == lot_id)
+                .values(available_spots=ParkingLot.available_spots - 1)
+                .execution_options(synchronize_session=False)
+            )
+            stage_occupancy('mark', candidate_id, True)
+            forget_lot_availability()
+            return candidate_id
+        if spot_id is not None:
+            return None
+    return None
+
+def free_spot(spot_id):
+    freed = db.session.execute(
+        db.update(ParkingSpot)
+        .where(ParkingSpot.id == spot_id, ParkingSpot.is_occupied == True)
+        .values(is_occupied=False)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if freed:
+        lot_id = db.select(ParkingSpot.parking_lot_id).where(ParkingSpot.id == spot_id).scalar_subquery()
+        db.session.execute(
+            db.update(ParkingLot)
+            .where(ParkingLot.id == lot_id)
+            .values(available_spots=ParkingLot.available_spots + 1)
+            .execution_options(synchronize_session=False)
+        )
+        stage_occupancy('mark', spot_id, False)
+        forget_lot_availability()
+    return bool(freed)
+
+def place_booking(user_id, lot_id, vehicle_number, spot_id=None):
+    lot = db.session.get(ParkingLot, lot_id)
+    if not lot:
+        raise AllocationError('Selected parking lot does not exist.')
+    claimed_id = claim_spot(lot.id, spot_id)
+    if claimed_id is None:
+        db.session.rollback()
+        if spot_id is not None:
+            raise AllocationError('Selected parking spot is no longer available.')
+        raise AllocationError('No available spots in this parking lot.')
+    booking = Booking(
+        user_id=user_id,
+        parking_spot_id=claimed_id,
+        parking_lot_id=lot_id,
+        vehicle_number=vehicle_number.upper(),
+        total_cost=lot.price_per_hour
+    )
+    db.session.add(booking)
+    forget_user_summary(user_id)
+    db.session.commit()
+    return booking
+
+def book_spot(user_id, lot_id, vehicle_number, spot_id=None):
+    try:
+        return retry_on_conflict(lambda: place_booking(user_id, lot_id, vehicle_number, spot_id))
+    except IntegrityError:
+        db.session.rollback()
+        raise AllocationError('You already have an active booking. Please release it first.')
+    except SQLAlchemyError:
+        db.session.rollback()
+        raise AllocationError('An error occurred while booking. Please try again.')
+
+def complete_booking(booking, release_time=None):
+    release_time = release_time or datetime.utcnow()
+    hours_parked, booking.total_cost = current_tariff().price(booking.total_cost, booking.booking_time, release_time)
+    booking.status = 'completed'
+    booking.release_time = release_time
+    record_closed_booking(booking)
+    forget_user_summary(booking.user_id)
+    free_spot(booking.parking_spot_id)
+    return hours_parked
+
+def place_bookings(items):
+    emails = {item['email'] for item in items}
+    users = dict(db.session.execute(db.select(User.email, User.id).where(User.email.in_(emails))).all())
+    lots = dict(db.session.execute(
+        db.select(ParkingLot.id, ParkingLot.price_per_hour).where(ParkingLot.id.in_({item['lot_id'] for item in items}))
+    ).all())
+    busy_users = set(db.session.execute(
+        db.select(Booking.user_id).where(Booking.status == 'active', Booking.user_id.in_(users.values()))
+    ).scalars())
+    errors = []
+    bookings = []
+    for index, item in enumerate(items):
+        user_id = users.get(item['email'])
+        if user_id is None:
+            errors.append({'index': index, 'error': f"Unknown user {item['email']}."})
+            continue
+        if user_id in busy_users:
+            errors.append({'index': index, 'error': f"{item['email']} already has an active booking."})
+            continue
+        if item['lot_id'] not in lots:
+            errors.append({'index': index, 'error': 'Selected parking lot does not exist.'})
+            continue
+        claimed_id = claim_spot(item['lot_id'], item.get('spot_id'))
+        if claimed_id is None:
+            errors.append({'index': index, 'error': 'No available spots in this parking lot.'})
+            continue
+        busy_users.add(user_id)
+        booking = Booking(
+            user_id=user_id,
+            parking_spot_id=claimed_id,
+            parking_lot_id=item['lot_id'],
+            vehicle_number=item['vehicle_number'].upper(),
+            total_cost=lots[item['lot_id']]
+        )
+        db.session.add(booking)
+        forget_user_summary(user_id)
+        bookings.append(booking)
+    if errors:
+        db.session.rollback()
+        raise AllocationError(f'{len(errors)} of {len(items)} bookings could not be made.', errors)
+    db.session.commit()
+    return bookings
+
+def book_spots(items):
+    try:
+        return retry_on_conflict(lambda: place_bookings(items))
+    except IntegrityError:
+        db.session.rollback()
+        raise AllocationError('A spot or user in this batch was booked by another request. Please try again.')
+    except SQLAlchemyError:
+        db.session.rollback()
+        raise AllocationError('An error occurred while booking. Please try again.')
+
+def close_bookings(booking_ids):
+    bookings = {
+        booking.id: booking
+        for booking in Booking.query.filter(Booking.id.in_(booking_ids), Booking.status == 'active')
+    }
+    errors = [
+        {'index': index, 'error': f'Booking {booking_id} is not active.'}
+        for index, booking_id in enumerate(booking_ids) if booking_id not in bookings
+    ]
+    if errors:
+        db.session.rollback()
+        raise AllocationError(f'{len(errors)} of {len(booking_ids)} bookings could not be released.', errors)
+    release_time = datetime.utcnow()
+    for booking in bookings.values():
+        complete_booking(booking, release_time)
+    db.session.commit()
+    return list(bookings.values())
+
+def release_bookings(booking_ids):
+    try:
+        return retry_on_conflict(lambda: close_bookings(booking_ids))
+    except SQLAlchemyError:
+        db.session.rollback()
+        raise AllocationError('An error occurred while releasing. Please try again.')
+
+def release_booking(booking_id):
+    def release():
+        booking = db.session.get(Booking, booking_id)
+        if booking is None or booking.status != 'active':
+            raise AllocationError('Booking is not active.')
+        hours_parked = complete_booking(booking)
+        db.session.commit()
+        return booking, hours_parked
+    try:
+        return retry_on_conflict(release)
+    except SQLAlchemyError:
+        db.session.rollback()
+        raise AllocationError('An error occurred while releasing the parking spot. Please try again.')
@@ -0,0 +1,247 @@
+from datetime import datetime, timezone
+from flask import Blueprint, jsonify, request, session
+from models import db, User, Booking, ParkingLot
+from allocation import AllocationError, book_spot, book_spots, release_booking, release_bookings
+from lot_cache import cached_lot_listing
+from lot_search import search_lot_ids
+from reservations import available_spots, bookable_spots, cancel_reservation, check_in, check_window, reserve_spot
+from timeseries import SERIES_RESOLUTIONS, lot_series, peak_hours
+
+MAX_BATCH_SIZE = 500
+MAX_SERIES_DAYS = 3660
+ADMIN_ENDPOINTS = ('api.batch_book', 'api.batch_release', 'api.occupancy', 'api.occupancy_peak_hours')
+
+api = Blueprint('api', __name__, url_prefix='/api')
+
+def api_error(message, status, errors=None):
+    body = {'error': message}
+    if errors:
+        body['errors'] = errors
+    return jsonify(body), status
+
+def current_user_id():
+    if 'user_id' not in session:
+        session['user_id'] = db.session.execute(
+            db.select(User.id).where(User.email == session['email'])
+        ).scalar()
+    return session['user_id']
+
+def booking_json(booking):
+    return {
+        'id': booking.id,
+        'user_id': booking.user_id,
+        'lot_id': booking.parking_lot_id,
+        'spot_id': booking.parking_spot_id,
+        'vehicle_number': booking.vehicle_number,
+        'status': booking.status,
+        'booking_time': booking.booking_time.isoformat() if booking.booking_time else None,
+        'release_time': booking.release_time.isoformat() if booking.release_time else None,
+        'reserved_until': booking.reserved_until.isoformat() if booking.reserved_until else None,
+        'total_cost': booking.total_cost
+    }
+
+def json_int(value):
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise ValueError
+    return value
+
+def booking_item(data, with_email=False):
+    if with_email and not isinstance(data.get('email'), str):
+        raise ValueError
+    lot_id = json_int(data.get('lot_id'))
+    spot_id = data.get('spot_id')
+    vehicle_number = (data.get('vehicle_number') or '').strip()
+    if not 1 <= len(vehicle_number) <= 20:
+        raise ValueError
+    return {
+        'email': data.get('email'),
+        'lot_id': lot_id,
+        'spot_id': json_int(spot_id) if spot_id is not None else None,
+        'vehicle_number': vehicle_number
+    }
+
+def utc_time(value):
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+def reservation_window(data):
+    return utc_time(data.get('start')), utc_time(data.get('end'))
+
+def owned_booking(booking_id):
+    booking = db.session.get(Booking, booking_id)
+    if not booking or (booking.user_id != current_user_id() and not session.get('is_admin', False)):
+        return None
+    return booking
+
+def batch_items(data, key):
+    items = data.get(key) if isinstance(data, dict) else None
+    if not isinstance(items, list) or not items:
+        raise ValueError(f'Expected a non-empty "{key}" list.')
+    if len(items) > MAX_BATCH_SIZE:
+        raise ValueError(f'At most {MAX_BATCH_SIZE} items per batch.')
+    return items
+
+def series_args(default_days):
+    lot_id = request.args.get('lot_id', type=int)
+    days = request.args.get('days', default_days, type=int)
+    if not 1 <= days <= MAX_SERIES_DAYS:
+        raise ValueError(f'"days" must be between 1 and {MAX_SERIES_DAYS}.')
+    if lot_id is not None and not db.session.get(ParkingLot, lot_id):
+        raise LookupError('Parking lot not found.')
+    return lot_id, days
+
+@api.before_request
+def require_login():
+    if 'email' not in session:
+        return api_error('Login required.', 401)
+    if request.endpoint in ADMIN_ENDPOINTS and not session.get('is_admin', False):
+        return api_error('Admin access required.', 403)
+    if request.method == 'POST' and not request.is_json:
+        return api_error('Expected a JSON request body (Content-Type: application/json).', 415)
+
+@api.route('/lots')
+def list_lots():
+    location = request.args.get('location', '').strip()
+    lots = cached_lot_listing(search_lot_ids(location)) if location else cached_lot_listing()
+    return jsonify({'lots': lots})
+
+@api.route('/lots/<int:lot_id>/spots')
+def free_spots(lot_id):
+    if not db.session.get(ParkingLot, lot_id):
+        return api_error('Parking lot not found.', 404)
+    spots = bookable_spots(lot_id)
+    return jsonify({'lot_id': lot_id, 'spots': [{'id': spot.id, 'spot_number': spot.spot_number} for spot in spots]})
+
+@api.route('/lots/<int:lot_id>/availability')
+def availability(lot_id):
+    if not db.session.get(ParkingLot, lot_id):
+        return api_error('Parking lot not found.', 404)
+    try:
+        start, end = reservation_window(request.args)
+    except (TypeError, ValueError):
+        return api_error('Expected ISO 8601 "start" and "end" times.', 400)
+    if start >= end:
+        return api_error('"end" must be after "start".', 400)
+    spots = available_spots(lot_id, start, end)
+    return jsonify({
+        'lot_id': lot_id,
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'spots': [{'id': spot.id, 'spot_number': spot.spot_number} for spot in spots]
+    })
+
+@api.route('/reservations', methods=['POST'])
+def reserve():
+    data = request.get_json(silent=True) or {}
+    try:
+        item = booking_item(data)
+        start, end = reservation_window(data)
+    except (TypeError, ValueError, AttributeError):
+        return api_error('Expected integer "lot_id", optional integer "spot_id", a "vehicle_number" and ISO 8601 "start" and "end" times.', 400)
+    try:
+        check_window(start, end)
+    except AllocationError as e:
+        return api_error(str(e), 400)
+    try:
+        booking = reserve_spot(current_user_id(), item['lot_id'], item['vehicle_number'], start, end, spot_id=item['spot_id'])
+    except AllocationError as e:
+        return api_error(str(e), 409)
+    return jsonify(booking_json(booking)), 201
+
+@api.route('/reservations/<int:booking_id>/cancel', methods=['POST'])
+def cancel(booking_id):
+    if not owned_booking(booking_id):
+        return api_error('Reservation not found.', 404)
+    try:
+        booking = cancel_reservation(booking_id)
+    except AllocationError as e:
+        return api_error(str(e), 409)
+    return jsonify(booking_json(booking))
+
+@api.route('/reservations/<int:booking_id>/check-in', methods=['POST'])
+def reservation_check_in(booking_id):
+    if not owned_booking(booking_id):
+        return api_error('Reservation not found.', 404)
+    try:
+        booking = check_in(booking_id)
+    except AllocationError as e:
+        return api_error(str(e), 409)
+    return jsonify(booking_json(booking))
+
+@api.route('/bookings', methods=['POST'])
+def book():
+    try:
+        item = booking_item(request.get_json(silent=True) or {})
+    except (ValueError, AttributeError):
+        return api_error('Expected integer "lot_id", optional integer "spot_id" and a "vehicle_number".', 400)
+    try:
+        booking = book_spot(current_user_id(), item['lot_id'], item['vehicle_number'], spot_id=item['spot_id'])
+    except AllocationError as e:
+        return api_error(str(e), 409)
+    return jsonify(booking_json(booking)), 201
+
+@api.route('/bookings/<int:booking_id>')
+def booking_status(booking_id):
+    booking = owned_booking(booking_id)
+    if not booking:
+        return api_error('Booking not found.', 404)
+    return jsonify(booking_json(booking))
+
+@api.route('/bookings/<int:booking_id>/release', methods=['POST'])
+def release(booking_id):
+    if not owned_booking(booking_id):
+        return api_error('Booking not found.', 404)
+    try:
+        booking, _ = release_booking(booking_id)
+    except AllocationError as e:
+        return api_error(str(e), 409)
+    return jsonify(booking_json(booking))
+
+@api.route('/bookings/batch', methods=['POST'])
+def batch_book():
+    try:
+        items = [booking_item(item, with_email=True) for item in batch_items(request.get_json(silent=True), 'bookings')]
+    except (ValueError, AttributeError) as e:
+        return api_error(str(e) or 'Each booking needs "email", integer "lot_id" and a "vehicle_number".', 400)
+    try:
+        bookings = book_spots(items)
+    except AllocationError as e:
+        return api_error(str(e), 409, e.errors)
+    return jsonify({'bookings': [booking_json(booking) for booking in bookings]}), 201
+
+@api.route('/bookings/batch-release', methods=['POST'])
+def batch_release():
+    try:
+        booking_ids = [json_int(booking_id) for booking_id in batch_items(request.get_json(silent=True), 'booking_ids')]
+    except ValueError as e:
+        return api_error(str(e) or 'Booking ids must be integers.', 400)
+    try:
+        bookings = release_bookings(booking_ids)
+    except AllocationError as e:
+        return api_error(str(e), 409, e.errors)
+    return jsonify({'bookings': [booking_json(booking) for booking in bookings]})
+
+@api.route('/occupancy')
+def occupancy():
+    resolution = request.args.get('resolution', 'hour')
+    if resolution not in SERIES_RESOLUTIONS:
+        return api_error(f'"resolution" must be one of: {", ".join(SERIES_RESOLUTIONS)}.', 400)
+    try:
+        lot_id, days = series_args(7)
+    except ValueError as e:
+        return api_error(str(e), 400)
+    except LookupError as e:
+        return api_error(str(e), 404)
+    return jsonify({'lot_id': lot_id, 'resolution': resolution, 'days': days, 'points': lot_series(lot_id, resolution, days)})
+
+@api.route('/occupancy/peak-hours')
+def occupancy_peak_hours():
+    try:
+        lot_id, days = series_args(30)
+    except ValueError as e:
+        return api_error(str(e), 400)
+    except LookupError as e:
+        return api_error(str(e), 404)
+    return jsonify({'lot_id': lot_id, 'days': days, 'hours': peak_hours(lot_id, days)})
@@ -0,0 +1,145 @@
+import json
+import time
+import zlib
+from datetime import datetime, timedelta
+from models import db, Booking, BookingArchive, DailyLotStats, OccupancySnapshot, ParkingLot, ParkingSpot
+from database import retry_on_conflict
+from allocation import AllocationError
+from occupancy import stage_occupancy
+from reservations import close_reservation, stage_reservation
+from rollups import forget_user_bookings
+from user_summary import forget_user_summary
+from lot_search import stage_lot_search
+from lot_cache import forget_lot_metadata
+
+ARCHIVE_CHUNK_SIZE = 1000
+DELETE_CHUNK_SIZE = 500
+CHUNK_PAUSE = 0.01
+
+ARCHIVE_COLUMNS = [
+    'id', 'vehicle_number', 'booking_time', 'release_time', 'status', 'total_cost',
+    'user_id', 'parking_spot_id', 'parking_lot_id'
+]
+
+def archive_payload(rows):
+    lines = [
+        json.dumps(dict(zip(ARCHIVE_COLUMNS, [
+            value.isoformat(sep=' ') if hasattr(value, 'isoformat') else value for value in row
+        ])))
+        for row in rows
+    ]
+    return zlib.compress(('\n'.join(lines) + '\n').encode('utf-8'), 6)
+
+def archive_chunk(before, chunk_size):
+    rows = db.session.execute(
+        db.select(*[getattr(Booking, column) for column in ARCHIVE_COLUMNS])
+        .where(Booking.status.in_(['completed', 'cancelled']), Booking.booking_time < before)
+        .order_by(Booking.id).limit(chunk_size)
+    ).all()
+    if not rows:
+        return 0
+    booking_ids = [row[0] for row in rows]
+    booking_times = [row[2] for row in rows]
+    db.session.add(BookingArchive(
+        first_booking_id=booking_ids[0],
+        last_booking_id=booking_ids[-1],
+        first_booking_time=min(booking_times),
+        last_booking_time=max(booking_times),
+        rows=len(rows),
+        payload=archive_payload(rows)
+    ))
+    db.session.execute(
+        db.delete(Booking).where(Booking.id.in_(booking_ids)).execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return len(rows)
+
+def archive_bookings(before, chunk_size=ARCHIVE_CHUNK_SIZE):
+    archived = 0
+    while True:
+        moved = retry_on_conflict(lambda: archive_chunk(before, chunk_size))
+        if not moved:
+            return archived
+        archived += moved
+        time.sleep(CHUNK_PAUSE)
+
+def archived_bookings(date_from=None, date_to=None):
+    query = db.select(BookingArchive.id)
+    if date_from:
+        query = query.where(BookingArchive.last_booking_time >= datetime.combine(date_from, datetime.min.time()))
+    if date_to:
+        before = datetime.combine(date_to + timedelta(days=1), datetime.min.time())
+        query = query.where(BookingArchive.first_booking_time < before)
+    for archive_id in db.session.execute(query.order_by(BookingArchive.id)).scalars().all():
+        payload = db.session.execute(
+            db.select(BookingArchive.payload).where(BookingArchive.id == archive_id)
+        ).scalar()
+        for line in zlib.decompress(payload).decode('utf-8').splitlines():
+            booking = json.loads(line)
+            day = booking['booking_time'][:10]
+            if date_from and day < date_from.isoformat() or date_to and day > date_to.isoformat():
+                continue
+            yield line
+
+def delete_chunk(model, condition, chunk_size, before_delete=None):
+    ids = db.session.execute(db.select(model.id).where(condition).limit(chunk_size)).scalars().all()
+    if ids:
+        if before_delete:
+            before_delete(ids)
+        db.session.execute(db.delete(model).where(model.id.in_(ids)).execution_options(synchronize_session=False))
+        db.session.commit()
+    return len(ids)
+
+def delete_in_chunks(model, condition, chunk_size, before_delete=None):
+    deleted = 0
+    while True:
+        removed = retry_on_conflict(lambda: delete_chunk(model, condition, chunk_size, before_delete))
+        if not removed:
+            return deleted
+        deleted += removed
+        time.sleep(CHUNK_PAUSE)
+
+def close_lot(lot_id):
+    db.session.execute(
+        db.update(ParkingSpot).where(ParkingSpot.parking_lot_id == lot_id, ParkingSpot.is_occupied == False)
+        .values(is_occupied=True).execution_options(synchronize_session=False)
+    )
+    active = db.session.execute(
+        db.select(db.func.count(Booking.id)).where(Booking.parking_lot_id == lot_id, Booking.status == 'active')
+    ).scalar()
+    if active:
+        db.session.rollback()
+        raise AllocationError(f'{active} spots are currently occupied.')
+    db.session.execute(
+        db.update(ParkingLot).where(ParkingLot.id == lot_id).values(available_spots=0)
+        .execution_options(synchronize_session=False)
+    )
+    reservations = Booking.query.filter_by(parking_lot_id=lot_id, status='reserved').all()
+    now = datetime.utcnow()
+    for booking in reservations:
+        close_reservation(booking, now)
+    stage_occupancy('drop_lot', lot_id)
+    stage_reservation('drop_lot', lot_id)
+    stage_lot_search(lot_id)
+    forget_lot_metadata()
+    db.session.commit()
+    return len(reservations)
+
+def forget_lot_bookings(booking_ids):
+    for user_id in forget_user_bookings(booking_ids):
+        forget_user_summary(user_id)
+
+def delete_lot(lot_id, chunk_size=DELETE_CHUNK_SIZE):
+    reservations = retry_on_conflict(lambda: close_lot(lot_id))
+    bookings = delete_in_chunks(Booking, Booking.parking_lot_id == lot_id, chunk_size, forget_lot_bookings)
+    spots = delete_in_chunks(ParkingSpot, ParkingSpot.parking_lot_id == lot_id, chunk_size)
+
+    def remove_lot():
+        db.session.execute(db.delete(DailyLotStats).where(DailyLotStats.parking_lot_id == lot_id))
+        db.session.execute(db.delete(OccupancySnapshot).where(OccupancySnapshot.parking_lot_id == lot_id))
+        db.session.execute(db.delete(ParkingLot).where(ParkingLot.id == lot_id))
+        forget_lot_metadata()
+        db.session.commit()
+
+    retry_on_conflict(remove_lot)
+    return {'bookings': bookings, 'spots': spots, 'reservations': reservations}
@@ -0,0 +1,93 @@
+import hmac
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+from cache import TTLCache
+from models import db, User
+
+DEFAULT_HASH_METHOD = 'pbkdf2:sha256:600000'
+HASH_PREFIXES = ('pbkdf2:', 'scrypt:')
+HASH_CHUNK_SIZE = 200
+
+admin_identity = TTLCache(maxsize=1, ttl=3600)
+hash_pools = {}
+hash_pool_lock = threading.Lock()
+dummy_hashes = {}
+
+def hash_method():
+    return current_app.config.get('PASSWORD_HASH_METHOD', DEFAULT_HASH_METHOD)
+
+def is_password_hash(stored):
+    return stored.startswith(HASH_PREFIXES) and stored.count('$') == 2
+
+def stored_method(stored):
+    return stored.split('$', 1)[0]
+
+def hashing_pool(workers):
+    with hash_pool_lock:
+        if workers not in hash_pools:
+            hash_pools[workers] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+        return hash_pools[workers]
+
+def run_hashing(work, *args):
+    workers = current_app.config.get('PASSWORD_HASH_WORKERS', 0)
+    if not workers:
+        return work(*args)
+    return hashing_pool(workers).submit(work, *args).result()
+
+def hash_password(password, method=None):
+    return run_hashing(generate_password_hash, password, method or hash_method())
+
+def check_password(stored, password):
+    if not is_password_hash(stored):
+        return hmac.compare_digest(stored.encode('utf-8'), password.encode('utf-8'))
+    return run_hashing(check_password_hash, stored, password)
+
+def dummy_hash():
+    method = hash_method()
+    if method not in dummy_hashes:
+        dummy_hashes[method] = generate_password_hash('not a password', method)
+    return dummy_hashes[method]
+
+def authenticate(email, password):
+    user = db.session.execute(db.select(User.id, User.password).where(User.email == email)).first()
+    if user is None:
+        check_password(dummy_hash(), password)
+        return None
+    if not check_password(user.password, password):
+        return None
+    if not is_password_hash(user.password) or stored_method(user.password) != stored_method(dummy_hash()):
+        db.session.execute(
+            db.update(User).where(User.id == user.id).values(password=hash_password(password))
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+    return user.id
+
+def admin_user_id():
+    return admin_identity.get_or_load(
+        'admin', lambda: db.session.execute(db.select(db.func.min(User.id))).scalar()
+    )
+
+def is_admin_user(user_id):
+    return user_id == admin_user_id()
+
+def hash_stored_passwords(chunk_size=HASH_CHUNK_SIZE):
+    hashed = 0
+    last_id = 0
+    while True:
+        rows = db.session.execute(
+            db.select(User.id, User.password).where(User.id > last_id).order_by(User.id).limit(chunk_size)
+        ).all()
+        if not rows:
+            return hashed
+        updates = [
+            {'id': user_id, 'password': hash_password(password)}
+            for user_id, password in rows if not is_password_hash(password)
+        ]
+        if updates:
+            db.session.execute(db.update(User), updates)
+            db.session.commit()
+        hashed += len(updates)
+        last_id = rows[-1][0]
@@ -0,0 +1,513 @@
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from flask import Flask
+from sqlalchemy.exc import OperationalError
+from models import db, User, ParkingLot, ParkingSpot, Booking
+from allocation import AllocationError, book_spot, release_booking
+from billing import Tariff
+from database import init_database
+from occupancy import OccupancyIndex, occupancy_index
+from auth import DEFAULT_HASH_METHOD, admin_identity, hash_password
+from seeding import SEEDED_PASSWORD
+
+ROUTE_SCENARIOS = [
+    'login', 'user_dashboard', 'search', 'booking_cycle', 'admin_dashboard', 'admin_users', 'admin_reports'
+]
+
+def make_scratch_app(db_path, profile='wal'):
+    scratch = Flask(__name__)
+    scratch.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + db_path
+    scratch.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    scratch.config['DATABASE_PROFILE'] = profile
+    scratch.extensions['tariff'] = Tariff()
+    init_database(scratch)
+    return scratch
+
+def seed_stress_data(spots, users):
+    lot = ParkingLot(name='Stress Lot', location='Bench', total_spots=spots, available_spots=spots, price_per_hour=50.0)
+    db.session.add(lot)
+    db.session.flush()
+    db.session.execute(db.insert(ParkingSpot), [
+        {'spot_number': f"A{i:02d}", 'parking_lot_id': lot.id, 'is_occupied': False}
+        for i in range(1, spots + 1)
+    ])
+    db.session.execute(db.insert(User), [
+        {'email': f"driver{i}@bench.local", 'password': 'x', 'fullname': 'Bench Driver',
+         'address': 'Bench', 'phone': '0000000000', 'pincode': '000000'}
+        for i in range(users)
+    ])
+    db.session.commit()
+    return lot.id, [user_id for (user_id,) in db.session.query(User.id).all()]
+
+def run_allocation_stress(threads=8, spots=200, users=400, retries=20):
+    with tempfile.TemporaryDirectory() as tmp:
+        scratch = make_scratch_app(os.path.join(tmp, 'stress.db'))
+        with scratch.app_context():
+            db.create_all()
+            lot_id, user_ids = seed_stress_data(spots, users)
+        outcome = {'booked': 0, 'rejected': 0, 'lock_retries': 0}
+        outcome_lock = threading.Lock()
+
+        def worker(chunk):
+            with scratch.app_context():
+                for user_id in chunk:
+                    for _ in range(retries):
+                        try:
+                            book_spot(user_id, lot_id, f"KA{user_id:06d}")
+                            result = 'booked'
+                        except AllocationError:
+                            result = 'rejected'
+                        except OperationalError:
+                            db.session.rollback()
+                            with outcome_lock:
+                                outcome['lock_retries'] += 1
+                            continue
+                        with outcome_lock:
+                            outcome[result] += 1
+                        break
+                db.session.remove()
+
+        chunks = [user_ids[i::threads] for i in range(threads)]
+        workers = [threading.Thread(target=worker, args=(chunk,)) for chunk in chunks]
+        started = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        with scratch.app_context():
+            double_booked = db.session.query(Booking.parking_spot_id).filter_by(status='active').group_by(
+                Booking.parking_spot_id
+            ).having(db.func.count(Booking.id) > 1).count()
+            active = Booking.query.filter_by(status='active').count()
+            occupied = ParkingSpot.query.filter_by(is_occupied=True).count()
+            available = db.session.get(ParkingLot, lot_id).available_spots
+            db.session.remove()
+            db.engine.dispose()
+
+    return {
+        'threads': threads,
+        'spots': spots,
+        'attempts': users,
+        'booked': outcome['booked'],
+        'rejected': outcome['rejected'],
+        'lock_retries': outcome['lock_retries'],
+        'double_booked_spots': double_booked,
+        'active_bookings': active,
+        'occupied_spots': occupied,
+        'available_counter': available,
+        'seconds': round(elapsed, 3),
+        'bookings_per_second': round(outcome['booked'] / elapsed, 1) if elapsed else 0.0,
+        'consistent': (
+            double_booked == 0 and active == occupied == outcome['booked'] == min(spots, users)
+            and available == spots - occupied
+        )
+    }
+
+def run_write_benchmark(profile='wal', threads=8, cycles=400, readers=4):
+    with tempfile.TemporaryDirectory() as tmp:
+        scratch = make_scratch_app(os.path.join(tmp, 'writes.db'), profile)
+        with scratch.app_context():
+            db.create_all()
+            lot_id, user_ids = seed_stress_data(threads * 2, threads)
+        outcome = {'writes': 0, 'failed': 0, 'reads': 0}
+        outcome_lock = threading.Lock()
+        ready = threading.Barrier(threads + readers + 1)
+        writing = threading.Event()
+
+        def worker(user_id, count):
+            writes = failed = 0
+            with scratch.app_context():
+                ready.wait()
+                for _ in range(count):
+                    try:
+                        booking = book_spot(user_id, lot_id, f"KA{user_id:06d}")
+                        writes += 1
+                        release_booking(booking.id)
+                        writes += 1
+                    except AllocationError:
+                        db.session.rollback()
+                        active = Booking.query.filter_by(user_id=user_id, status='active').first()
+                        failed += 1
+                        if active:
+                            try:
+                                release_booking(active.id)
+                            except AllocationError:
+                                db.session.rollback()
+                db.session.remove()
+            with outcome_lock:
+                outcome['writes'] += writes
+                outcome['failed'] += failed
+
+        def reader():
+            reads = 0
+            with scratch.app_context():
+                ready.wait()
+                while writing.is_set():
+                    db.session.execute(
+                        db.select(Booking.status, db.func.count(Booking.id), db.func.sum(Booking.total_cost)).group_by(Booking.status)
+                    ).all()
+                    db.session.rollback()
+                    reads += 1
+                db.session.remove()
+            with outcome_lock:
+                outcome['reads'] += reads
+
+        workers = [
+            threading.Thread(target=worker, args=(user_id, cycles // threads + (1 if index < cycles % threads else 0)))
+            for index, user_id in enumerate(user_ids)
+        ]
+        reader_threads = [threading.Thread(target=reader) for _ in range(readers)]
+        writing.set()
+        for thread in workers + reader_threads:
+            thread.start()
+        ready.wait()
+        started = time.perf_counter()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        writing.clear()
+        for thread in reader_threads:
+            thread.join()
+        with scratch.app_context():
+            journal_mode = db.session.execute(db.text('PRAGMA journal_mode')).scalar()
+            db.session.remove()
+            db.engine.dispose()
+
+    return {
+        'profile': profile,
+        'journal_mode': journal_mode,
+        'threads': threads,
+        'cycles': cycles,
+        'writes': outcome['writes'],
+        'failed_cycles': outcome['failed'],
+        'seconds': round(elapsed, 3),
+        'writes_per_second': round(outcome['writes'] / elapsed, 1) if elapsed else 0.0,
+        'readers': readers,
+        'reads_per_second': round(outcome['reads'] / elapsed, 1) if elapsed else 0.0
+    }
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))]
+
+def summarize(timings, errors, seconds):
+    timings = sorted(timings)
+    return {
+        'requests': len(timings),
+        'errors': errors,
+        'seconds': round(seconds, 3),
+        'throughput': round(len(timings) / seconds, 1) if seconds else 0.0,
+        'mean_ms': round(sum(timings) / len(timings) * 1000, 2) if timings else 0.0,
+        'p50_ms': round(percentile(timings, 0.5) * 1000, 2),
+        'p90_ms': round(percentile(timings, 0.9) * 1000, 2),
+        'p99_ms': round(percentile(timings, 0.99) * 1000, 2),
+        'max_ms': round(timings[-1] * 1000, 2) if timings else 0.0
+    }
+
+def benchmark_accounts(count, admin_password):
+    admin = (db.session.execute(db.select(User.email).order_by(User.id).limit(1)).scalar_one(), admin_password)
+    busy = db.select(Booking.user_id).where(Booking.status == 'active')
+    users = [(email, SEEDED_PASSWORD) for email in db.session.execute(
+        db.select(User.email)
+        .where(User.email != admin[0], User.id.not_in(busy), User.email.like('%@example.test'))
+        .order_by(User.id)
+        .limit(count)
+    ).scalars()]
+    if len(users) < count:
+        raise RuntimeError(f'Need {count} users without an active booking, found {len(users)}. Run flask generate-data first.')
+    lots = db.session.execute(
+        db.select(ParkingLot.id, ParkingLot.location).order_by(ParkingLot.available_spots.desc()).limit(count)
+    ).all()
+    return admin, users, lots
+
+def dataset_size():
+    return {
+        'users': db.session.query(User).count(),
+        'lots': db.session.query(ParkingLot).count(),
+        'spots': db.session.query(ParkingSpot).count(),
+        'bookings': db.session.query(Booking).count()
+    }
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def login(client, email, password):
+    return client.post('/', data={'email': email, 'password': password, 'submit': 'Login'})
+
+def scenario_requests(scenario, client, account, lot):
+    lot_id, location = lot
+    if scenario == 'login':
+        return [('login', lambda: login(client, *account), 302)]
+    if scenario == 'user_dashboard':
+        return [('user_dashboard', lambda: client.get('/user-dashboard'), 200)]
+    if scenario == 'search':
+        return [('search', lambda: client.get('/user-dashboard', query_string={'location': location[:4]}), 200)]
+    if scenario == 'booking_cycle':
+        def book():
+            spot = occupancy_index.first_free(lot_id)
+            return client.post('/user-dashboard', data={
+                'lot_id': str(lot_id), 'spot_id': str(spot.id if spot else 0),
+                'vehicle_number': 'BENCH01', 'submit': 'Book Now'
+            })
+        release = lambda: client.post('/release-parking', data={'submit': 'Release Spot'})
+        return [('book', book, 302), ('release', release, 302)]
+    if scenario == 'admin_dashboard':
+        return [('admin_dashboard', lambda: client.get('/admin-dashboard'), 200)]
+    if scenario == 'admin_users':
+        return [('admin_users', lambda: client.get('/admin/users'), 200)]
+    if scenario == 'admin_reports':
+        return [('admin_reports', lambda: client.get('/admin/reports'), 200)]
+    raise ValueError(f'Unknown scenario {scenario}')
+
+def run_scenario(app, scenario, accounts, lots, requests, concurrency):
+    timings = {}
+    errors = {}
+    lock = threading.Lock()
+    ready = threading.Barrier(concurrency + 1)
+
+    def worker(index):
+        with app.app_context():
+            client = app.test_client()
+            account = accounts[index % len(accounts)]
+            login(client, *account)
+            steps = scenario_requests(scenario, client, account, lots[index % len(lots)])
+            local_timings = {name: [] for name, _, _ in steps}
+            local_errors = {name: 0 for name, _, _ in steps}
+            ready.wait()
+            for _ in range(requests // concurrency + (1 if index < requests % concurrency else 0)):
+                for name, call, expected_status in steps:
+                    started = time.perf_counter()
+                    response = call()
+                    local_timings[name].append(time.perf_counter() - started)
+                    if response.status_code != expected_status:
+                        local_errors[name] += 1
+            with lock:
+                for name, values in local_timings.items():
+                    timings.setdefault(name, []).extend(values)
+                    errors[name] = errors.get(name, 0) + local_errors[name]
+            db.session.remove()
+
+    workers = [threading.Thread(target=worker, args=(index,)) for index in range(concurrency)]
+    for thread in workers:
+        thread.start()
+    ready.wait()
+    started = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return {name: summarize(values, errors[name], elapsed) for name, values in timings.items()}
+
+def run_route_benchmark(app, requests=200, concurrency=8, scenarios=None, admin_password='admin123'):
+    scenarios = scenarios or ROUTE_SCENARIOS
+    with app.app_context():
+        admin, users, lots = benchmark_accounts(concurrency, admin_password)
+        dataset = dataset_size()
+        occupancy_index.ensure_loaded()
+    csrf_enabled = app.config.get('WTF_CSRF_ENABLED', True)
+    app.config['WTF_CSRF_ENABLED'] = False
+    results = {}
+    try:
+        for scenario in scenarios:
+            accounts = [admin] if scenario.startswith('admin_') else users
+            results.update(run_scenario(app, scenario, accounts, lots, requests, concurrency))
+    finally:
+        app.config['WTF_CSRF_ENABLED'] = csrf_enabled
+    return {
+        'commit': current_commit(),
+        'recorded_at': datetime.utcnow().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'requests_per_scenario': requests,
+        'concurrency': concurrency,
+        'dataset': dataset,
+        'results': results
+    }
+
+def run_login_benchmark(app, logins=200, concurrency=8, method=None, workers=0):
+    email = 'login-bench@bench.local'
+    password = 'bench-password'
+    saved = {key: app.config.get(key) for key in ('PASSWORD_HASH_METHOD', 'PASSWORD_HASH_WORKERS', 'WTF_CSRF_ENABLED')}
+    app.config['PASSWORD_HASH_METHOD'] = method or saved['PASSWORD_HASH_METHOD'] or DEFAULT_HASH_METHOD
+    app.config['PASSWORD_HASH_WORKERS'] = workers
+    app.config['WTF_CSRF_ENABLED'] = False
+    try:
+        with app.app_context():
+            db.session.execute(db.delete(User).where(User.email == email))
+            started = time.perf_counter()
+            password_hash = hash_password(password)
+            hash_seconds = time.perf_counter() - started
+            db.session.add(User(email=email, password=password_hash, fullname='Login Bench',
+                                address='Bench', phone='0000000000', pincode='000000'))
+            db.session.commit()
+        results = run_scenario(app, 'login', [(email, password)], [(None, '')], logins, concurrency)
+    finally:
+        with app.app_context():
+            db.session.execute(db.delete(User).where(User.email == email))
+            db.session.commit()
+        admin_identity.clear()
+        app.config.update(saved)
+    return {
+        'method': password_hash.split('$', 1)[0],
+        'workers': workers,
+        'concurrency': concurrency,
+        'hash_ms': round(hash_seconds * 1000, 2),
+        **results['login']
+    }
+
+def seed_reservations(lot_id, user_id, reservations, rng, now):
+    spot_ids = db.session.execute(
+        db.select(ParkingSpot.id).where(ParkingSpot.parking_lot_id == lot_id).order_by(ParkingSpot.id)
+    ).scalars().all()
+    rows = []
+    for position, spot_id in enumerate(spot_ids):
+        end = now + timedelta(minutes=rng.randint(0, 120))
+        for _ in range(reservations // len(spot_ids) + (1 if position < reservations % len(spot_ids) else 0)):
+            start = end + timedelta(minutes=rng.randint(0, 12 * 60))
+            end = start + timedelta(minutes=rng.randint(30, 8 * 60))
+            rows.append({
+                'vehicle_number': f"KA{spot_id:06d}", 'booking_time': start, 'reserved_until': end,
+                'status': 'reserved', 'total_cost': 50.0, 'user_id': user_id,
+                'parking_spot_id': spot_id, 'parking_lot_id': lot_id
+            })
+    for i in range(0, len(rows), 10000):
+        db.session.execute(db.insert(Booking), rows[i:i + 10000])
+    db.session.commit()
+    return max(row['reserved_until'] for row in rows)
+
+def sql_available_spot_ids(lot_id, start, end):
+    overlapping = db.select(Booking.id).where(
+        Booking.parking_spot_id == ParkingSpot.id, Booking.status == 'reserved',
+        Booking.booking_time < end, Booking.reserved_until > start
+    ).exists()
+    return db.session.execute(
+        db.select(ParkingSpot.id)
+        .where(ParkingSpot.parking_lot_id == lot_id, ParkingSpot.is_occupied == False, ~overlapping)
+        .order_by(ParkingSpot.id)
+    ).scalars().all()
+
+def run_reservation_benchmark(spots=2000, reservations=100000, queries=200, sql_queries=20, seed=42):
+    from reservations import ReservationIndex
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        scratch = make_scratch_app(os.path.join(tmp, 'reservations.db'))
+        with scratch.app_context():
+            db.create_all()
+            lot_id, (user_id,) = seed_stress_data(spots, 1)
+            now = datetime.utcnow().replace(second=0, microsecond=0)
+            horizon = seed_reservations(lot_id, user_id, reservations, rng, now)
+            spot_index = OccupancyIndex()
+            reservation_index = ReservationIndex()
+            started = time.perf_counter()
+            spot_index.rebuild()
+            reservation_index.rebuild()
+            load_seconds = time.perf_counter() - started
+            windows = []
+            for _ in range(queries):
+                start = now + (horizon - now) * rng.random()
+                windows.append((start, start + timedelta(minutes=rng.randint(60, 8 * 60))))
+            timings = []
+            free_counts = []
+            for start, end in windows:
+                started = time.perf_counter()
+                reserved = reservation_index.reserved_spot_ids(lot_id, start, end)
+                free = spot_index.free_spots(lot_id, exclude=reserved)
+                timings.append(time.perf_counter() - started)
+                free_counts.append(len(free))
+            sql_timings = []
+            mismatches = 0
+            for start, end in windows[:sql_queries]:
+                started = time.perf_counter()
+                expected = sql_available_spot_ids(lot_id, start, end)
+                sql_timings.append(time.perf_counter() - started)
+                reserved = reservation_index.reserved_spot_ids(lot_id, start, end)
+                if expected != [spot.id for spot in spot_index.free_spots(lot_id, exclude=reserved)]:
+                    mismatches += 1
+            db.session.remove()
+            db.engine.dispose()
+    indexed = summarize(timings, 0, sum(timings))
+    scanned = summarize(sql_timings, 0, sum(sql_timings))
+    return {
+        'spots': spots,
+        'reservations': reservations,
+        'index_load_seconds': round(load_seconds, 3),
+        'queries': queries,
+        'mean_free_spots': round(sum(free_counts) / len(free_counts), 1) if free_counts else 0.0,
+        'index_p50_ms': indexed['p50_ms'],
+        'index_p99_ms': indexed['p99_ms'],
+        'sql_p50_ms': scanned['p50_ms'],
+        'sql_p99_ms': scanned['p99_ms'],
+        'mismatches': mismatches
+    }
+
+STARTUP_SCRIPT = """
+import json, time
+started = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+app = create_app()
+created = time.perf_counter()
+app.test_client().get('/')
+served = time.perf_counter()
+print(json.dumps({'import': imported - started, 'create_app': created - imported, 'first_request': served - created}))
+"""
+
+def measure_cold_start(runs=5):
+    timings = {'interpreter': [], 'import': [], 'create_app': [], 'first_request': [], 'total': []}
+    with tempfile.TemporaryDirectory() as scratch_dir:
+        env = {**os.environ, 'DATABASE_URL': 'sqlite:///' + os.path.join(scratch_dir, 'startup.db')}
+        for _ in range(runs):
+            started = time.perf_counter()
+            output = subprocess.run(
+                [sys.executable, '-c', STARTUP_SCRIPT], cwd=os.path.dirname(os.path.abspath(__file__)),
+                env=env, capture_output=True, text=True, check=True
+            ).stdout
+            total = time.perf_counter() - started
+            phases = json.loads(output.strip().splitlines()[-1])
+            for phase, seconds in phases.items():
+                timings[phase].append(seconds)
+            timings['interpreter'].append(total - sum(phases.values()))
+            timings['total'].append(total)
+    return {
+        phase: {
+            'median_ms': round(percentile(sorted(values), 0.5) * 1000, 1),
+            'max_ms': round(max(values) * 1000, 1)
+        }
+        for phase, values in timings.items()
+    }
+
+def load_results(path):
+    with open(path) as results_file:
+        return json.load(results_file)
+
+def save_results(report, path):
+    with open(path, 'w') as results_file:
+        json.dump(report, results_file, indent=2)
+
+def compare_results(previous, current):
+    lines = []
+    for name, stats in current['results'].items():
+        before = previous.get('results', {}).get(name)
+        if not before:
+            continue
+        changes = []
+        for key in ('p50_ms', 'p99_ms', 'throughput'):
+            change = (stats[key] - before[key]) / before[key] * 100 if before[key] else 0.0
+            changes.append(f"{key} {before[key]} -> {stats[key]} ({change:+.1f}%)")
+        lines.append(f"{name}: {', '.join(changes)}")
+    return lines
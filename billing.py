@@ -0,0 +1,185 @@
+import time
+from datetime import date, datetime
+from flask import current_app
+from models import db, Booking, ParkingLot, User
+from rollups import booking_time_bounds
+
+PRICING_BATCH_SIZE = 50000
+
+numpy_module = []
+
+def load_numpy():
+    if not numpy_module:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        numpy_module.append(numpy)
+    return numpy_module[0]
+
+def parse_hours(spec):
+    hours = set()
+    for part in (spec or '').split(','):
+        part = part.strip()
+        if not part:
+            continue
+        start, _, end = part.partition('-')
+        start = int(start)
+        end = int(end) if end else start + 1
+        if not 0 <= start < 24 or not 0 < end <= 24 or start >= end:
+            raise ValueError(f'Invalid hour range "{part}", expected e.g. 8-10 (end exclusive).')
+        hours.update(range(start, end))
+    return frozenset(hours)
+
+class Tariff:
+    def __init__(self, peak_hours=frozenset(), peak_multiplier=1.0, daily_cap_hours=None, grace_minutes=0):
+        if peak_multiplier <= 0:
+            raise ValueError('The peak multiplier must be positive.')
+        if daily_cap_hours is not None and daily_cap_hours <= 0:
+            raise ValueError('The daily cap must be a positive number of hours.')
+        if grace_minutes < 0:
+            raise ValueError('The grace period cannot be negative.')
+        self.peak_hours = frozenset(peak_hours)
+        self.peak_multiplier = peak_multiplier
+        self.daily_cap_hours = daily_cap_hours
+        self.grace_seconds = grace_minutes * 60
+        multipliers = [peak_multiplier if hour in self.peak_hours else 1.0 for hour in range(24)] * 2
+        self.hour_units = [0.0]
+        for multiplier in multipliers:
+            self.hour_units.append(self.hour_units[-1] + multiplier)
+        self.day_units = self.capped(self.hour_units[24])
+
+    def capped(self, units):
+        return units if self.daily_cap_hours is None else min(units, self.daily_cap_hours)
+
+    def billed_hours(self, seconds):
+        if seconds <= self.grace_seconds:
+            return 0
+        return max(1, int(seconds // 3600))
+
+    def price(self, hourly_rate, start, end):
+        hours = self.billed_hours((end - start).total_seconds())
+        if not hours:
+            return 0, 0.0
+        days, remainder = divmod(hours, 24)
+        units = days * self.day_units + self.capped(self.hour_units[start.hour + remainder] - self.hour_units[start.hour])
+        return hours, round(float(hourly_rate * units), 2)
+
+    def price_batch(self, hourly_rates, start_hours, durations):
+        np = load_numpy()
+        if np is None:
+            costs = []
+            for hourly_rate, start_hour, seconds in zip(hourly_rates, start_hours, durations):
+                hours = self.billed_hours(seconds)
+                days, remainder = divmod(hours, 24)
+                units = days * self.day_units + self.capped(self.hour_units[start_hour + remainder] - self.hour_units[start_hour])
+                costs.append(round(hourly_rate * units, 2) if hours else 0.0)
+            return costs
+        hourly_rates = np.asarray(hourly_rates, dtype=np.float64)
+        start_hours = np.asarray(start_hours, dtype=np.int64)
+        durations = np.asarray(durations, dtype=np.float64)
+        hours = np.maximum(1, durations // 3600).astype(np.int64)
+        days, remainder = np.divmod(hours, 24)
+        hour_units = np.asarray(self.hour_units)
+        partial = hour_units[start_hours + remainder] - hour_units[start_hours]
+        if self.daily_cap_hours is not None:
+            partial = np.minimum(partial, self.daily_cap_hours)
+        costs = np.round(hourly_rates * (days * self.day_units + partial), 2)
+        return np.where(durations <= self.grace_seconds, 0.0, costs)
+
+def tariff_from_config(config):
+    return Tariff(
+        peak_hours=parse_hours(config.get('BILLING_PEAK_HOURS')),
+        peak_multiplier=config.get('BILLING_PEAK_MULTIPLIER', 1.0),
+        daily_cap_hours=config.get('BILLING_DAILY_CAP_HOURS'),
+        grace_minutes=config.get('BILLING_GRACE_MINUTES', 0)
+    )
+
+def current_tariff():
+    return current_app.extensions['tariff']
+
+def booking_timing_columns(dialect):
+    if dialect == 'sqlite':
+        return (
+            db.cast(db.func.strftime('%H', Booking.booking_time), db.Integer),
+            db.func.round((db.func.julianday(Booking.release_time) - db.func.julianday(Booking.booking_time)) * 86400.0, 3)
+        )
+    if dialect == 'postgresql':
+        return (
+            db.cast(db.extract('hour', Booking.booking_time), db.Integer),
+            db.extract('epoch', Booking.release_time - Booking.booking_time)
+        )
+    return None
+
+def priced_batches(tariff, conditions, batch_size=PRICING_BATCH_SIZE):
+    columns = booking_timing_columns(db.session.get_bind().dialect.name)
+    timing = columns if columns else (Booking.booking_time, Booking.release_time)
+    query = db.select(Booking.user_id, ParkingLot.price_per_hour, Booking.total_cost, *timing).join(
+        ParkingLot, Booking.parking_lot_id == ParkingLot.id
+    ).where(
+        Booking.status == 'completed', Booking.release_time.is_not(None), *conditions
+    ).execution_options(stream_results=True, yield_per=batch_size)
+    for partition in db.session.execute(query).partitions():
+        user_ids, rates, charged, first, second = zip(*partition)
+        if columns:
+            start_hours, durations = first, second
+        else:
+            start_hours = [start.hour for start in first]
+            durations = [(end - start).total_seconds() for start, end in zip(first, second)]
+        yield user_ids, charged, tariff.price_batch(rates, start_hours, durations)
+
+def simulate_tariff(tariff, date_from=None, date_to=None):
+    np = load_numpy()
+    started = time.perf_counter()
+    bookings = 0
+    charged_total = 0.0
+    simulated_total = 0.0
+    for _, charged, costs in priced_batches(tariff, booking_time_bounds(date_from, date_to)):
+        bookings += len(charged)
+        charged_total += float(sum(charged))
+        simulated_total += float(sum(costs)) if np is None else float(costs.sum())
+    return {
+        'bookings': bookings,
+        'charged_revenue': round(charged_total, 2),
+        'simulated_revenue': round(simulated_total, 2),
+        'change_percent': round((simulated_total - charged_total) / charged_total * 100, 2) if charged_total else 0.0,
+        'seconds': round(time.perf_counter() - started, 3),
+        'vectorized': np is not None
+    }
+
+def month_bounds(month):
+    first = datetime.strptime(month, '%Y-%m').date()
+    following = date(first.year + first.month // 12, first.month % 12 + 1, 1)
+    return first, date.fromordinal(following.toordinal() - 1)
+
+def invoice_month(tariff, month):
+    np = load_numpy()
+    date_from, date_to = month_bounds(month)
+    totals = {}
+    for user_ids, _, costs in priced_batches(tariff, booking_time_bounds(date_from, date_to)):
+        if np is not None:
+            ids, positions = np.unique(np.asarray(user_ids), return_inverse=True)
+            amounts = np.bincount(positions, weights=costs)
+            counts = np.bincount(positions)
+            batch = zip(ids.tolist(), counts.tolist(), amounts.tolist())
+        else:
+            batch_totals = {}
+            for user_id, cost in zip(user_ids, costs):
+                count, amount = batch_totals.get(user_id, (0, 0.0))
+                batch_totals[user_id] = (count + 1, amount + cost)
+            batch = ((user_id, count, amount) for user_id, (count, amount) in batch_totals.items())
+        for user_id, count, amount in batch:
+            previous_count, previous_amount = totals.get(user_id, (0, 0.0))
+            totals[user_id] = (previous_count + count, previous_amount + amount)
+    users = {}
+    user_ids = list(totals)
+    for i in range(0, len(user_ids), 500):
+        users.update({
+            user_id: (email, fullname) for user_id, email, fullname in db.session.execute(
+                db.select(User.id, User.email, User.fullname).where(User.id.in_(user_ids[i:i + 500]))
+            )
+        })
+    for user_id in sorted(totals):
+        email, fullname = users.get(user_id, ('', ''))
+        count, amount = totals[user_id]
+        yield user_id, email, fullname, count, round(amount, 2)
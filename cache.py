@@ -0,0 +1,70 @@
+import threading
+import time
+from collections import OrderedDict
+from hooks import run_after_commit
+
+class TTLCache:
+    def __init__(self, maxsize=1024, ttl=60, max_weight=None, weigh=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_weight = max_weight
+        self.weigh = weigh
+        self.weight = 0
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self.discard(key)
+                self.misses += 1
+                return default
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def discard(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.weight -= entry[2]
+
+    def set(self, key, value):
+        weight = self.weigh(value) if self.weigh else 0
+        with self.lock:
+            self.discard(key)
+            if self.max_weight is not None and weight > self.max_weight:
+                return
+            self.entries[key] = (time.monotonic() + self.ttl, value, weight)
+            self.weight += weight
+            while len(self.entries) > self.maxsize or (self.max_weight is not None and self.weight > self.max_weight):
+                self.discard(next(iter(self.entries)))
+
+    def get_or_load(self, key, loader):
+        value = self.get(key)
+        if value is None:
+            value = loader()
+            self.set(key, value)
+        return value
+
+    def invalidate(self, key):
+        with self.lock:
+            self.discard(key)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.weight = 0
+
+    def stats(self):
+        with self.lock:
+            stats = {'size': len(self.entries), 'hits': self.hits, 'misses': self.misses}
+            if self.max_weight is not None:
+                stats['weight'] = self.weight
+            return stats
+
+def invalidate_after_commit(cache, key):
+    run_after_commit(cache.invalidate, key)
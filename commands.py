@@ -0,0 +1,282 @@
+import time
+from datetime import datetime, timedelta
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from database import DATABASE_PROFILES
+from models import db
+from schema import create_schema, migrate_indexes, seed_sample_data
+from reports import booking_filters
+from exports import EXPORT_FORMATS, export_chunks
+
+cli = AppGroup('parking')
+
+def register_commands(app):
+    for command in cli.commands.values():
+        app.cli.add_command(command)
+
+def describe_migration(report):
+    for column in report['added_columns']:
+        print(f"Added column {column}")
+    for name in report['dropped']:
+        print(f"Dropped superseded index {name}")
+    for name, ids in report['skipped'].items():
+        print(f"Skipped {name}: more than one active booking for id(s) {', '.join(str(booking_id) for booking_id in ids)}")
+
+@cli.command('init-db')
+def init_db_command():
+    report = create_schema()
+    describe_migration(report)
+    print(f"Schema ready, indexes in place: {', '.join(report['created'])}")
+
+@cli.command('seed-sample-data')
+def seed_sample_data_command():
+    create_schema()
+    seeded = seed_sample_data()
+    if not seeded['lots']:
+        print('Parking lots already exist, sample data not loaded.')
+        return
+    print(f"Loaded {seeded['lots']} sample lots with {seeded['spots']} spots")
+    if seeded['admin']:
+        print("Admin user created: admin@parking.com / admin123")
+
+@cli.command('benchmark-startup')
+@click.option('--runs', default=5, show_default=True, help='Fresh interpreters to start.')
+def benchmark_startup_command(runs):
+    from benchmarks import measure_cold_start
+    result = measure_cold_start(runs)
+    print(f"{'phase':<16}{'median ms':>10}{'max ms':>9}")
+    for phase, stats in result.items():
+        print(f"{phase:<16}{stats['median_ms']:>10}{stats['max_ms']:>9}")
+
+@cli.command('migrate-indexes')
+def migrate_indexes_command():
+    report = migrate_indexes()
+    describe_migration(report)
+    print(f"Indexes in place: {', '.join(report['created'])}")
+
+@cli.command('stress-allocation')
+@click.option('--threads', default=8, show_default=True)
+@click.option('--spots', default=200, show_default=True)
+@click.option('--users', default=400, show_default=True)
+def stress_allocation_command(threads, spots, users):
+    from benchmarks import run_allocation_stress
+    result = run_allocation_stress(threads=threads, spots=spots, users=users)
+    for key, value in result.items():
+        print(f"{key}: {value}")
+    if not result['consistent']:
+        raise SystemExit('Allocation stress test found an inconsistency.')
+
+@cli.command('generate-data')
+@click.option('--users', default=1000, show_default=True)
+@click.option('--lots', default=50, show_default=True)
+@click.option('--spots-per-lot', default=100, show_default=True, help='Average spots per lot (each lot gets 50-150% of this).')
+@click.option('--bookings', default=50000, show_default=True, help='Completed and cancelled bookings to spread over --days.')
+@click.option('--active', default=0, show_default=True, help='Active bookings (occupied spots) to create.')
+@click.option('--days', default=180, show_default=True)
+@click.option('--seed', default=42, show_default=True)
+def generate_data_command(users, lots, spots_per_lot, bookings, active, days, seed):
+    from seeding import generate_data
+    db.create_all()
+    started = time.perf_counter()
+    counts = generate_data(users=users, lots=lots, spots_per_lot=spots_per_lot, bookings=bookings,
+                           active=active, days=days, seed=seed)
+    print(', '.join(f"{count} {name.replace('_', ' ')}" for name, count in counts.items()))
+    print(f"Generated in {time.perf_counter() - started:.1f}s. Generated users log in with password \"password\".")
+
+@cli.command('benchmark-routes')
+@click.option('--requests', default=200, show_default=True, help='Requests per scenario.')
+@click.option('--concurrency', default=8, show_default=True)
+@click.option('--scenario', 'scenarios', multiple=True, help='Scenario to run (repeatable); all by default.')
+@click.option('--output', type=click.Path(dir_okay=False), help='Save the results as JSON.')
+@click.option('--compare', type=click.Path(exists=True, dir_okay=False), help='Earlier results JSON to compare against.')
+@click.option('--admin-password', default='admin123', show_default=True, help='Password of the admin account, for the admin scenarios.')
+def benchmark_routes_command(requests, concurrency, scenarios, output, compare, admin_password):
+    from benchmarks import ROUTE_SCENARIOS, compare_results, load_results, run_route_benchmark, save_results
+    unknown = set(scenarios) - set(ROUTE_SCENARIOS)
+    if unknown:
+        raise click.BadParameter(f"unknown scenario(s) {', '.join(sorted(unknown))}; choose from {', '.join(ROUTE_SCENARIOS)}")
+    report = run_route_benchmark(current_app._get_current_object(), requests=requests, concurrency=concurrency, scenarios=list(scenarios), admin_password=admin_password)
+    print(f"{'route':<16}{'reqs':>7}{'errors':>8}{'req/s':>9}{'p50 ms':>9}{'p99 ms':>9}")
+    for name, stats in report['results'].items():
+        print(f"{name:<16}{stats['requests']:>7}{stats['errors']:>8}{stats['throughput']:>9}{stats['p50_ms']:>9}{stats['p99_ms']:>9}")
+    if output:
+        save_results(report, output)
+        print(f"Saved results to {output}")
+    if compare:
+        for line in compare_results(load_results(compare), report):
+            print(line)
+
+@cli.command('benchmark-logins')
+@click.option('--logins', default=200, show_default=True)
+@click.option('--concurrency', default=8, show_default=True)
+@click.option('--hash-method', 'methods', multiple=True, help='Werkzeug hash method to measure, e.g. pbkdf2:sha256:600000 or scrypt:32768:8:1 (repeatable; default: PARKING_PASSWORD_HASH).')
+@click.option('--workers', default=0, show_default=True, help='Hashing thread pool size, 0 to hash on the request thread.')
+def benchmark_logins_command(logins, concurrency, methods, workers):
+    from benchmarks import run_login_benchmark
+    print(f"{'method':<26}{'hash ms':>9}{'logins':>8}{'errors':>8}{'logins/s':>10}{'p50 ms':>9}{'p99 ms':>9}")
+    for method in methods or [current_app.config['PASSWORD_HASH_METHOD']]:
+        result = run_login_benchmark(current_app._get_current_object(), logins=logins, concurrency=concurrency, method=method, workers=workers)
+        print(f"{result['method']:<26}{result['hash_ms']:>9}{result['requests']:>8}{result['errors']:>8}"
+              f"{result['throughput']:>10}{result['p50_ms']:>9}{result['p99_ms']:>9}")
+
+@cli.command('hash-passwords')
+def hash_passwords_command():
+    from auth import hash_stored_passwords
+    hashed = hash_stored_passwords()
+    print(f"Hashed {hashed} plain text password(s) with {current_app.config['PASSWORD_HASH_METHOD']}")
+
+@cli.command('benchmark-reservations')
+@click.option('--spots', default=2000, show_default=True)
+@click.option('--reservations', default=100000, show_default=True, help='Future reservations spread over the spots.')
+@click.option('--queries', default=200, show_default=True, help='Availability checks for random windows.')
+def benchmark_reservations_command(spots, reservations, queries):
+    from benchmarks import run_reservation_benchmark
+    result = run_reservation_benchmark(spots=spots, reservations=reservations, queries=queries)
+    for key, value in result.items():
+        print(f"{key}: {value}")
+    if result['mismatches']:
+        raise SystemExit('The reservation index disagreed with the database.')
+
+@cli.command('benchmark-writes')
+@click.option('--profile', 'profiles', multiple=True, type=click.Choice(list(DATABASE_PROFILES)),
+              help='Database profile to measure (repeatable); all by default.')
+@click.option('--threads', default=8, show_default=True)
+@click.option('--cycles', default=400, show_default=True, help='Book/release cycles per profile.')
+@click.option('--readers', default=4, show_default=True, help='Threads running report queries during the writes.')
+def benchmark_writes_command(profiles, threads, cycles, readers):
+    from benchmarks import run_write_benchmark
+    for profile in profiles or DATABASE_PROFILES:
+        result = run_write_benchmark(profile=profile, threads=threads, cycles=cycles, readers=readers)
+        print(f"{profile}: {result['writes_per_second']} writes/s, {result['reads_per_second']} reads/s, "
+              f"{result['failed_cycles']} failed cycles ({result['writes']} writes in {result['seconds']}s, "
+              f"journal_mode={result['journal_mode']})")
+
+def tariff_options(command):
+    command = click.option('--peak-hours', help='Peak hour ranges, e.g. "8-10,17-20" (end exclusive).')(command)
+    command = click.option('--peak-multiplier', type=float, help='Rate multiplier for peak hours.')(command)
+    command = click.option('--daily-cap-hours', type=float, help='Most hours charged per 24 hours parked.')(command)
+    command = click.option('--grace-minutes', type=int, help='Stays this short are free.')(command)
+    return command
+
+def tariff_overrides(peak_hours, peak_multiplier, daily_cap_hours, grace_minutes):
+    from billing import tariff_from_config
+    config = dict(current_app.config)
+    overrides = {
+        'BILLING_PEAK_HOURS': peak_hours,
+        'BILLING_PEAK_MULTIPLIER': peak_multiplier,
+        'BILLING_DAILY_CAP_HOURS': daily_cap_hours,
+        'BILLING_GRACE_MINUTES': grace_minutes
+    }
+    config.update({key: value for key, value in overrides.items() if value is not None})
+    try:
+        return tariff_from_config(config)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
+@cli.command('simulate-tariff')
+@click.option('--from', 'date_from', type=click.DateTime(formats=['%Y-%m-%d']), help='First booking day (inclusive).')
+@click.option('--to', 'date_to', type=click.DateTime(formats=['%Y-%m-%d']), help='Last booking day (inclusive).')
+@tariff_options
+def simulate_tariff_command(date_from, date_to, peak_hours, peak_multiplier, daily_cap_hours, grace_minutes):
+    from billing import simulate_tariff
+    tariff = tariff_overrides(peak_hours, peak_multiplier, daily_cap_hours, grace_minutes)
+    result = simulate_tariff(tariff, date_from.date() if date_from else None, date_to.date() if date_to else None)
+    for key, value in result.items():
+        print(f"{key}: {value}")
+
+@cli.command('invoice-month')
+@click.argument('month')
+@click.option('--output', default='-', type=click.Path(dir_okay=False, allow_dash=True), help='CSV file to write, "-" for stdout.')
+@tariff_options
+def invoice_month_command(month, output, peak_hours, peak_multiplier, daily_cap_hours, grace_minutes):
+    import csv
+    from billing import invoice_month, month_bounds
+    tariff = tariff_overrides(peak_hours, peak_multiplier, daily_cap_hours, grace_minutes)
+    try:
+        month_bounds(month)
+    except ValueError:
+        raise click.BadParameter('expected YYYY-MM', param_hint='MONTH')
+    rows = invoice_month(tariff, month)
+    with click.open_file(output, 'w') as out:
+        writer = csv.writer(out)
+        writer.writerow(['user_id', 'email', 'fullname', 'bookings', 'amount'])
+        writer.writerows(rows)
+
+@cli.command('sweep')
+@click.option('--max-active-hours', type=int, help='Bookings active longer than this are stale (default: PARKING_STALE_BOOKING_HOURS or 24).')
+@click.option('--close-stale/--flag-only', default=None, help='Complete stale bookings instead of only listing them.')
+def sweep_command(max_active_hours, close_stale):
+    from sweeper import describe_sweep, sweep
+    report = sweep(
+        max_active_hours or current_app.config['STALE_BOOKING_HOURS'],
+        current_app.config['CLOSE_STALE_BOOKINGS'] if close_stale is None else close_stale
+    )
+    lines = describe_sweep(report)
+    for line in lines:
+        print(line)
+    if not lines:
+        print('No drift found.')
+
+@cli.command('snapshot-occupancy')
+@click.option('--downsample', 'roll_up', is_flag=True, help='Also roll old snapshots up into hourly and daily points.')
+def snapshot_occupancy_command(roll_up):
+    from timeseries import downsample, take_snapshot
+    db.create_all()
+    print(f"Snapshot taken for {take_snapshot()} lot(s)")
+    if roll_up:
+        counts = downsample()
+        print(f"Rolled up {counts['raw_rows_rolled_up']} raw and {counts['hourly_rows_rolled_up']} hourly snapshot(s)")
+
+@cli.command('export-bookings')
+@click.option('--format', 'export_format', type=click.Choice(list(EXPORT_FORMATS)), default='csv', show_default=True)
+@click.option('--output', default='-', type=click.Path(dir_okay=False, allow_dash=True), help='File to write, "-" for stdout.')
+@click.option('--gzip', 'compress', is_flag=True, help='Gzip the output.')
+@click.option('--from', 'date_from', type=click.DateTime(formats=['%Y-%m-%d']), help='First booking day (inclusive).')
+@click.option('--to', 'date_to', type=click.DateTime(formats=['%Y-%m-%d']), help='Last booking day (inclusive).')
+@click.option('--lot-id', type=int)
+@click.option('--status', type=click.Choice(['active', 'completed', 'cancelled', 'reserved']))
+def export_bookings_command(export_format, output, compress, date_from, date_to, lot_id, status):
+    conditions = booking_filters(
+        lot_id=lot_id,
+        status=status,
+        date_from=date_from.date() if date_from else None,
+        date_to=date_to.date() if date_to else None
+    )
+    with click.open_file(output, 'wb') as out:
+        for chunk in export_chunks(conditions, export_format, compress):
+            out.write(chunk)
+
+@cli.command('backfill-rollups')
+@click.option('--from', 'date_from', type=click.DateTime(formats=['%Y-%m-%d']), help='First day to rebuild (inclusive).')
+@click.option('--to', 'date_to', type=click.DateTime(formats=['%Y-%m-%d']), help='Last day to rebuild (inclusive).')
+def backfill_rollups_command(date_from, date_to):
+    from rollups import backfill_rollups
+    db.create_all()
+    counts = backfill_rollups(
+        date_from=date_from.date() if date_from else None,
+        date_to=date_to.date() if date_to else None
+    )
+    print(f"Rollups rebuilt: {counts['lot_days']} lot-days, {counts['user_days']} user-days")
+    if counts['kept_before']:
+        print(f"Days before {counts['kept_before']} include archived bookings and were kept as they were")
+
+@cli.command('archive-bookings')
+@click.option('--older-than-days', default=365, show_default=True, help='Archive completed and cancelled bookings that started before this many days ago.')
+@click.option('--chunk-size', default=1000, show_default=True, help='Bookings moved per transaction.')
+def archive_bookings_command(older_than_days, chunk_size):
+    from archival import archive_bookings
+    db.create_all()
+    before = datetime.combine(datetime.utcnow().date(), datetime.min.time()) - timedelta(days=older_than_days)
+    archived = archive_bookings(before, chunk_size)
+    print(f"Archived {archived} booking(s) that started before {before.date()}")
+
+@cli.command('export-archive')
+@click.option('--output', default='-', type=click.Path(dir_okay=False, allow_dash=True), help='File to write, "-" for stdout.')
+@click.option('--from', 'date_from', type=click.DateTime(formats=['%Y-%m-%d']), help='First booking day (inclusive).')
+@click.option('--to', 'date_to', type=click.DateTime(formats=['%Y-%m-%d']), help='Last booking day (inclusive).')
+def export_archive_command(output, date_from, date_to):
+    from archival import archived_bookings
+    with click.open_file(output, 'w') as out:
+        for line in archived_bookings(date_from.date() if date_from else None, date_to.date() if date_to else None):
+            out.write(line + '\n')
@@ -0,0 +1,33 @@
+import os
+
+def env_float(name, default=None):
+    value = os.environ.get(name)
+    return float(value) if value else default
+
+class Config:
+    SECRET_KEY = os.environ.get('PARKING_SECRET_KEY', 'mykey')
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    DATABASE_PROFILE = os.environ.get('PARKING_DB_PROFILE', 'wal')
+    INSTRUMENTATION = os.environ.get('PARKING_INSTRUMENTATION') == '1'
+    PROFILE_SLOW_REQUESTS = env_float('PARKING_PROFILE_SLOW_REQUESTS', 0.0)
+    BILLING_PEAK_HOURS = os.environ.get('PARKING_PEAK_HOURS', '')
+    BILLING_PEAK_MULTIPLIER = env_float('PARKING_PEAK_MULTIPLIER', 1.0)
+    BILLING_DAILY_CAP_HOURS = env_float('PARKING_DAILY_CAP_HOURS')
+    BILLING_GRACE_MINUTES = int(os.environ.get('PARKING_GRACE_MINUTES', 0))
+    SWEEP_INTERVAL = int(os.environ.get('PARKING_SWEEP_INTERVAL', 0))
+    STALE_BOOKING_HOURS = int(os.environ.get('PARKING_STALE_BOOKING_HOURS', 24))
+    CLOSE_STALE_BOOKINGS = os.environ.get('PARKING_CLOSE_STALE_BOOKINGS') == '1'
+    DELETE_CHUNK_SIZE = int(os.environ.get('PARKING_DELETE_CHUNK_SIZE', 500))
+    DASHBOARD_INLINE_SPOTS = int(os.environ.get('PARKING_DASHBOARD_INLINE_SPOTS', 2000))
+    PASSWORD_HASH_METHOD = os.environ.get('PARKING_PASSWORD_HASH', 'pbkdf2:sha256:600000')
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PARKING_PASSWORD_HASH_WORKERS', 0))
+    SNAPSHOT_INTERVAL = int(os.environ.get('PARKING_SNAPSHOT_INTERVAL', 0))
+    MAX_EVENT_STREAMS = int(os.environ.get('PARKING_MAX_EVENT_STREAMS', 8))
+
+class ProductionConfig(Config):
+    SECRET_KEY = os.environ.get('PARKING_SECRET_KEY')
+
+CONFIGS = {
+    'default': Config,
+    'production': ProductionConfig
+}
@@ -0,0 +1,78 @@
+import os
+import random
+import time
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError
+from models import db
+
+DATABASE_PROFILES = {
+    'default': {
+        'pragmas': {},
+        'busy_timeout': 5,
+        'write_retries': 1
+    },
+    'wal': {
+        'pragmas': {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'cache_size': -20000,
+            'mmap_size': 268435456,
+            'temp_store': 'MEMORY'
+        },
+        'busy_timeout': 15,
+        'write_retries': 5
+    }
+}
+
+LOCK_ERRORS = ('database is locked', 'database table is locked', 'deadlock detected', 'could not serialize access')
+
+def database_url(sqlite_path):
+    url = os.environ.get('DATABASE_URL')
+    if not url:
+        return 'sqlite:///' + sqlite_path
+    if url.startswith('postgres://'):
+        url = 'postgresql://' + url[len('postgres://'):]
+    return url
+
+def engine_options(url, profile):
+    url = make_url(url)
+    if url.get_backend_name() != 'sqlite':
+        return {'pool_size': 10, 'max_overflow': 20, 'pool_timeout': 30, 'pool_pre_ping': True, 'pool_recycle': 1800}
+    options = {'connect_args': {'timeout': profile['busy_timeout'], 'check_same_thread': False}}
+    if url.database and url.database != ':memory:':
+        options.update({'pool_size': 10, 'max_overflow': 20, 'pool_timeout': 30})
+    return options
+
+def init_database(app):
+    profile = DATABASE_PROFILES[app.config.setdefault('DATABASE_PROFILE', 'wal')]
+    app.config.setdefault('DATABASE_WRITE_RETRIES', profile['write_retries'])
+    options = engine_options(app.config['SQLALCHEMY_DATABASE_URI'], profile)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {**options, **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})}
+    db.init_app(app)
+    with app.app_context():
+        engine = db.engine
+    if engine.dialect.name == 'sqlite' and profile['pragmas']:
+        event.listen(engine, 'connect', lambda connection, record: apply_pragmas(connection, profile['pragmas']))
+
+def apply_pragmas(connection, pragmas):
+    cursor = connection.cursor()
+    for name, value in pragmas.items():
+        cursor.execute(f'PRAGMA {name}={value}')
+    cursor.close()
+
+def is_lock_conflict(error):
+    message = str(getattr(error, 'orig', error)).lower()
+    return any(text in message for text in LOCK_ERRORS)
+
+def retry_on_conflict(work, attempts=None, delay=0.02):
+    attempts = attempts or current_app.config.get('DATABASE_WRITE_RETRIES', 1)
+    for attempt in range(attempts):
+        try:
+            return work()
+        except OperationalError as e:
+            db.session.rollback()
+            if attempt == attempts - 1 or not is_lock_conflict(e):
+                raise
+            time.sleep(delay * 2 ** attempt * random.uniform(0.5, 1.5))
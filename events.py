@@ -0,0 +1,81 @@
+import json
+import threading
+import time
+from collections import deque
+
+class Subscription:
+    def __init__(self, maxsize):
+        self.events = deque(maxlen=maxsize)
+        self.ready = threading.Condition()
+        self.overflowed = False
+
+    def put(self, message):
+        with self.ready:
+            if len(self.events) == self.events.maxlen:
+                self.overflowed = True
+            self.events.append(message)
+            self.ready.notify()
+
+    def drain(self, timeout):
+        with self.ready:
+            if not self.events:
+                self.ready.wait(timeout)
+            messages = list(self.events)
+            self.events.clear()
+            overflowed, self.overflowed = self.overflowed, False
+            return messages, overflowed
+
+class EventHub:
+    def __init__(self, maxsize=1000, heartbeat=15, poll_interval=2):
+        self.lock = threading.Lock()
+        self.subscriptions = set()
+        self.maxsize = maxsize
+        self.heartbeat = heartbeat
+        self.poll_interval = poll_interval
+
+    def subscribe(self, limit=None):
+        subscription = Subscription(self.maxsize)
+        with self.lock:
+            if limit and len(self.subscriptions) >= limit:
+                return None
+            self.subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            self.subscriptions.discard(subscription)
+
+    def subscriber_count(self):
+        with self.lock:
+            return len(self.subscriptions)
+
+    def publish(self, event, data):
+        with self.lock:
+            subscriptions = list(self.subscriptions)
+        if not subscriptions:
+            return
+        message = f"event: {event}\ndata: {json.dumps(data)}\n\n"
+        for subscription in subscriptions:
+            subscription.put(message)
+
+    def stream(self, subscription, poll=None):
+        try:
+            yield 'retry: 3000\n\n'
+            last_sent = time.monotonic()
+            while True:
+                if poll:
+                    poll()
+                messages, overflowed = subscription.drain(self.poll_interval if poll else self.heartbeat)
+                if overflowed:
+                    yield 'event: reset\ndata: {}\n\n'
+                elif messages:
+                    yield ''.join(messages)
+                elif time.monotonic() - last_sent >= self.heartbeat:
+                    yield ': keep-alive\n\n'
+                else:
+                    continue
+                last_sent = time.monotonic()
+        finally:
+            self.unsubscribe(subscription)
+
+event_hub = EventHub()
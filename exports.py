@@ -0,0 +1,67 @@
+import csv
+import io
+import json
+import zlib
+from models import db, User, ParkingLot, ParkingSpot, Booking
+
+EXPORT_COLUMNS = [
+    'booking_id', 'user_name', 'user_email', 'vehicle_number', 'lot_id', 'lot_name',
+    'spot_number', 'booking_time', 'release_time', 'status', 'total_cost'
+]
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson'
+}
+
+def export_rows(conditions, batch_size=1000):
+    query = db.select(
+        Booking.id, User.fullname, User.email, Booking.vehicle_number, ParkingLot.id, ParkingLot.name,
+        ParkingSpot.spot_number, Booking.booking_time, Booking.release_time, Booking.status, Booking.total_cost
+    ).join(
+        User, Booking.user_id == User.id
+    ).join(
+        ParkingSpot, Booking.parking_spot_id == ParkingSpot.id
+    ).join(
+        ParkingLot, Booking.parking_lot_id == ParkingLot.id
+    ).where(*conditions).order_by(Booking.id).execution_options(stream_results=True, yield_per=batch_size)
+    for partition in db.session.execute(query).partitions():
+        for row in partition:
+            yield [value.isoformat(sep=' ') if hasattr(value, 'isoformat') else value for value in row]
+
+def csv_chunks(rows, batch_size=1000):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for count, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if count % batch_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+def ndjson_chunks(rows, batch_size=1000):
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(dict(zip(EXPORT_COLUMNS, row))))
+        if len(lines) == batch_size:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+def gzip_chunks(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk.encode('utf-8'))
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+def export_chunks(conditions, export_format='csv', compress=False):
+    rows = export_rows(conditions)
+    chunks = ndjson_chunks(rows) if export_format == 'ndjson' else csv_chunks(rows)
+    if compress:
+        return gzip_chunks(chunks)
+    return (chunk.encode('utf-8') for chunk in chunks)
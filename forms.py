@@ -0,0 +1,81 @@
+from flask_wtf import FlaskForm
+from wtforms import FloatField, IntegerField, SelectField, StringField,SubmitField,BooleanField,DateField
+from wtforms.validators import DataRequired, NumberRange, Regexp, Length, Optional
+from provisioning import NAMING_SCHEMES
+
+class LoginForm(FlaskForm):
+    email= StringField('Email', validators=[DataRequired()])
+    password = StringField('Password', validators=[DataRequired()])
+
+class SignUpForm(FlaskForm):
+    email = StringField('Email', validators=[DataRequired()])
+    password = StringField('Password', validators=[DataRequired()])
+    address = StringField('Address', validators=[DataRequired()])
+    fullname = StringField('Full Name', validators=[DataRequired(), Regexp(r'^[A-Za-z\s]+$', message='Full name must contain only alphabets and spaces')])
+    pincode = StringField('Pincode', validators=[DataRequired(), Length(min=6, max=6, message='Pincode must be exactly 6 digits'), Regexp(r'^\d{6}$', message='Pincode must contain only numbers')])
+    phone = StringField('Phone', validators=[DataRequired(), Length(min=10, max=10, message='Phone number must be exactly 10 digits'), Regexp(r'^\d{10}$', message='Phone number must contain only numbers')])
+    submit = SubmitField('Sign Up')
+
+class ReleaseParkingForm(FlaskForm):
+    spot_display = StringField('Current Spot ID')
+    vehicle_display = StringField('Vehicle Number')
+    cost_display = StringField('Parking Cost')
+    submit = SubmitField('Release Spot')
+
+class ReleaseSpotForm(FlaskForm):
+    spot_id = IntegerField('Spot ID', validators=[DataRequired()])
+    submit = SubmitField('Release Spot')
+
+class SearchForm(FlaskForm):
+    location = StringField('Search Location', validators=[])
+
+class LotSelectionForm(FlaskForm):
+    lot_id = SelectField('Select Parking Lot', choices=[], validators=[DataRequired()])
+    submit = SubmitField('Load Available Spots')
+
+class BookingForm(FlaskForm):
+    lot_id = IntegerField('Lot ID', validators=[DataRequired()])
+    spot_id = SelectField('Available Spots', choices=[], validators=[DataRequired()])
+    vehicle_number = StringField('Vehicle Number', validators=[DataRequired()])
+    submit = SubmitField('Book Now')
+
+class LotManagementForm(FlaskForm):
+    lot_id = IntegerField('Lot ID', validators=[DataRequired()])
+    submit = SubmitField('Submit')
+
+class ParkingLotForm(FlaskForm):
+    name = StringField('Lot Name', validators=[DataRequired()])
+    location = StringField('Location', validators=[DataRequired()])
+    total_spots = IntegerField('Total Spots', validators=[DataRequired()])
+    price_per_hour = FloatField('Price per Hour (₹)', validators=[DataRequired()])
+    naming_scheme = SelectField('Spot Naming', choices=NAMING_SCHEMES, default='sequential')
+    spots_per_row = IntegerField('Spots per Row', validators=[Optional(), NumberRange(min=1, max=999)])
+    rows_per_level = IntegerField('Rows per Level', validators=[Optional(), NumberRange(min=1, max=702)])
+    submit = SubmitField('Add Parking Lot')
+
+class AdminSearchForm(FlaskForm):
+    search = StringField('Search Parking Lots', validators=[])
+
+class EditParkingLotForm(FlaskForm):
+    name = StringField('Lot Name', validators=[DataRequired()])
+    location = StringField('Location', validators=[DataRequired()])
+    total_spots = IntegerField('Total Spots', validators=[DataRequired()])
+    price_per_hour = FloatField('Price per Hour (₹)', validators=[DataRequired()])
+    submit = SubmitField('Update Parking Lot')
+
+class ReportFilterForm(FlaskForm):
+    class Meta:
+        csrf = False
+    lot_id = SelectField('Parking Lot', choices=[], validators=[Optional()])
+    user_email = StringField('User Email', validators=[Optional()])
+    status = SelectField('Status', choices=[('', 'All statuses'), ('active', 'Active'), ('completed', 'Completed'), ('cancelled', 'Cancelled'), ('reserved', 'Reserved')], validators=[Optional()])
+    date_from = DateField('From', validators=[Optional()])
+    date_to = DateField('To', validators=[Optional()])
+
+class EditSpotNameForm(FlaskForm):
+    spot_number = StringField('Spot Name/Number', validators=[DataRequired(), Length(min=1, max=10)])
+    submit = SubmitField('Update Spot Name')
+
+class ChangeSpotStatusForm(FlaskForm):
+    is_occupied = BooleanField('Spot Occupied')
+    submit = SubmitField('Update Status')
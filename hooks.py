@@ -0,0 +1,15 @@
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from models import db
+
+def run_after_commit(callback, *args):
+    db.session.info.setdefault('after_commit_callbacks', []).append((callback, args))
+
+@event.listens_for(Session, 'after_commit')
+def run_commit_callbacks(session):
+    for callback, args in session.info.pop('after_commit_callbacks', []):
+        callback(*args)
+
+@event.listens_for(Session, 'after_rollback')
+def discard_commit_callbacks(session):
+    session.info.pop('after_commit_callbacks', None)
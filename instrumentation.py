@@ -0,0 +1,177 @@
+import cProfile
+import heapq
+import os
+import re
+import threading
+import time
+from flask import g, has_request_context, request, template_rendered, before_render_template
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SLOW_QUERY_LIMIT = 20
+
+class EndpointStats:
+    __slots__ = ('buckets', 'count', 'total', 'statements', 'sql_time', 'render_time')
+
+    def __init__(self):
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.count = 0
+        self.total = 0.0
+        self.statements = 0
+        self.sql_time = 0.0
+        self.render_time = 0.0
+
+class RequestMetrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.endpoints = {}
+        self.slow_queries = []
+        self.sequence = 0
+
+    def observe(self, endpoint, duration, statements, sql_time, render_time):
+        with self.lock:
+            stats = self.endpoints.get(endpoint)
+            if stats is None:
+                stats = self.endpoints[endpoint] = EndpointStats()
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if duration <= bound:
+                    stats.buckets[i] += 1
+            stats.count += 1
+            stats.total += duration
+            stats.statements += statements
+            stats.sql_time += sql_time
+            stats.render_time += render_time
+
+    def observe_query(self, endpoint, statement, duration):
+        with self.lock:
+            if len(self.slow_queries) == SLOW_QUERY_LIMIT and duration <= self.slow_queries[0][0]:
+                return
+            self.sequence += 1
+            entry = (duration, self.sequence, endpoint, ' '.join(statement.split())[:200])
+            if len(self.slow_queries) < SLOW_QUERY_LIMIT:
+                heapq.heappush(self.slow_queries, entry)
+            else:
+                heapq.heapreplace(self.slow_queries, entry)
+
+    def reset(self):
+        with self.lock:
+            self.endpoints = {}
+            self.slow_queries = []
+
+    def snapshot(self):
+        with self.lock:
+            endpoints = {
+                endpoint: (list(stats.buckets), stats.count, stats.total, stats.statements, stats.sql_time, stats.render_time)
+                for endpoint, stats in self.endpoints.items()
+            }
+            return endpoints, sorted(self.slow_queries, reverse=True)
+
+request_metrics = RequestMetrics()
+
+def label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def prometheus_text(cache_stats=None):
+    endpoints, slow_queries = request_metrics.snapshot()
+    lines = [
+        '# HELP parking_request_duration_seconds Request latency by endpoint.',
+        '# TYPE parking_request_duration_seconds histogram'
+    ]
+    for endpoint, (buckets, count, total, _, _, _) in sorted(endpoints.items()):
+        name = label(endpoint)
+        for bound, bucket_count in zip(LATENCY_BUCKETS, buckets):
+            lines.append(f'parking_request_duration_seconds_bucket{{endpoint="{name}",le="{bound}"}} {bucket_count}')
+        lines.append(f'parking_request_duration_seconds_bucket{{endpoint="{name}",le="+Inf"}} {count}')
+        lines.append(f'parking_request_duration_seconds_sum{{endpoint="{name}"}} {total:.6f}')
+        lines.append(f'parking_request_duration_seconds_count{{endpoint="{name}"}} {count}')
+    for metric, position, help_text in (
+        ('parking_request_sql_statements_total', 3, 'SQL statements executed while serving requests.'),
+        ('parking_request_sql_seconds_total', 4, 'Time spent in SQL while serving requests.'),
+        ('parking_request_render_seconds_total', 5, 'Time spent rendering templates while serving requests.')
+    ):
+        lines.append(f'# HELP {metric} {help_text}')
+        lines.append(f'# TYPE {metric} counter')
+        for endpoint, values in sorted(endpoints.items()):
+            value = values[position]
+            lines.append(f'{metric}{{endpoint="{label(endpoint)}"}} {value if position == 3 else f"{value:.6f}"}')
+    lines.append('# HELP parking_slow_query_seconds Slowest SQL statements seen since start.')
+    lines.append('# TYPE parking_slow_query_seconds gauge')
+    for rank, (duration, _, endpoint, statement) in enumerate(slow_queries, 1):
+        lines.append(
+            f'parking_slow_query_seconds{{rank="{rank}",endpoint="{label(endpoint)}",statement="{label(statement)}"}} {duration:.6f}'
+        )
+    if cache_stats:
+        for metric, key in (('parking_cache_hits_total', 'hits'), ('parking_cache_misses_total', 'misses')):
+            lines.append(f'# TYPE {metric} counter')
+            for cache, stats in sorted(cache_stats.items()):
+                lines.append(f'{metric}{{cache="{label(cache)}"}} {stats[key]}')
+        lines.append('# TYPE parking_cache_entries gauge')
+        for cache, stats in sorted(cache_stats.items()):
+            lines.append(f'parking_cache_entries{{cache="{label(cache)}"}} {stats["size"]}')
+    return '\n'.join(lines) + '\n'
+
+def current_endpoint():
+    return request.endpoint or 'unmatched'
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'metrics_started' in g:
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get('query_started')
+    if not started or not has_request_context() or 'metrics_started' not in g:
+        return
+    duration = time.perf_counter() - started.pop()
+    g.metrics_statements += 1
+    g.metrics_sql_time += duration
+    request_metrics.observe_query(current_endpoint(), statement, duration)
+
+def before_render(app, template, context):
+    if 'metrics_started' in g:
+        g.metrics_render_started = time.perf_counter()
+
+def after_render(app, template, context):
+    if 'metrics_render_started' in g:
+        g.metrics_render_time += time.perf_counter() - g.pop('metrics_render_started')
+
+def dump_profile(app, profiler, duration):
+    profile_dir = app.config['PROFILE_DIR']
+    os.makedirs(profile_dir, exist_ok=True)
+    endpoint = re.sub(r'[^A-Za-z0-9_.-]', '_', current_endpoint())
+    profiler.dump_stats(os.path.join(profile_dir, f"{int(time.time() * 1000)}-{endpoint}-{int(duration * 1000)}ms.prof"))
+
+def init_instrumentation(app):
+    event.listen(Engine, 'before_cursor_execute', before_cursor_execute)
+    event.listen(Engine, 'after_cursor_execute', after_cursor_execute)
+    before_render_template.connect(before_render, app)
+    template_rendered.connect(after_render, app)
+
+    @app.before_request
+    def start_request_metrics():
+        g.metrics_statements = 0
+        g.metrics_sql_time = 0.0
+        g.metrics_render_time = 0.0
+        g.metrics_profiler = None
+        if app.config.get('PROFILE_SLOW_REQUESTS'):
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+                g.metrics_profiler = profiler
+            except ValueError:
+                pass
+        g.metrics_started = time.perf_counter()
+
+    @app.teardown_request
+    def finish_request_metrics(exc):
+        if 'metrics_started' not in g:
+            return
+        duration = time.perf_counter() - g.pop('metrics_started')
+        profiler = g.pop('metrics_profiler', None)
+        if profiler is not None:
+            profiler.disable()
+            if duration >= app.config['PROFILE_SLOW_REQUESTS']:
+                dump_profile(app, profiler, duration)
+        request_metrics.observe(
+            current_endpoint(), duration, g.metrics_statements, g.metrics_sql_time, g.metrics_render_time
+        )
@@ -0,0 +1,20 @@
+import threading
+import time
+from models import db
+
+def run_periodically(app, interval, name, job):
+    def run():
+        while True:
+            time.sleep(interval)
+            with app.app_context():
+                try:
+                    job()
+                except Exception:
+                    db.session.rollback()
+                    app.logger.exception(f'{name} run failed')
+                finally:
+                    db.session.remove()
+
+    thread = threading.Thread(target=run, name=name, daemon=True)
+    thread.start()
+    return thread
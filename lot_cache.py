@@ -0,0 +1,53 @@
+from cache import TTLCache, invalidate_after_commit
+from models import db, ParkingLot
+
+lot_metadata = TTLCache(maxsize=1, ttl=300)
+lot_availability = TTLCache(maxsize=1, ttl=30)
+lot_choices = TTLCache(maxsize=1, ttl=30)
+
+def load_lot_metadata():
+    rows = db.session.execute(
+        db.select(ParkingLot.id, ParkingLot.name, ParkingLot.location, ParkingLot.price_per_hour)
+        .order_by(ParkingLot.id)
+    ).all()
+    return [
+        {'id': lot_id, 'name': name, 'location': location, 'price_per_hour': price_per_hour}
+        for lot_id, name, location, price_per_hour in rows
+    ]
+
+def load_lot_availability():
+    return dict(db.session.execute(db.select(ParkingLot.id, ParkingLot.available_spots)).all())
+
+def cached_lot_listing(lot_ids=None):
+    metadata = lot_metadata.get_or_load('all', load_lot_metadata)
+    availability = lot_availability.get_or_load('all', load_lot_availability)
+    if lot_ids is None:
+        lots = metadata
+    else:
+        by_id = {lot['id']: lot for lot in metadata}
+        lots = [by_id[lot_id] for lot_id in lot_ids if lot_id in by_id]
+    return [dict(lot, available=availability.get(lot['id'], 0)) for lot in lots]
+
+def build_lot_choices(lots):
+    return [('', 'Choose a parking lot')] + [
+        (str(lot['id']), f"{lot['name']} - {lot['location']} ({lot['available']} spots available)")
+        for lot in lots
+    ]
+
+def cached_lot_choices():
+    return lot_choices.get_or_load('all', lambda: build_lot_choices(cached_lot_listing()))
+
+def forget_lot_availability():
+    invalidate_after_commit(lot_availability, 'all')
+    invalidate_after_commit(lot_choices, 'all')
+
+def forget_lot_metadata():
+    invalidate_after_commit(lot_metadata, 'all')
+    forget_lot_availability()
+
+def lot_cache_stats():
+    return {
+        'lot_metadata': lot_metadata.stats(),
+        'lot_availability': lot_availability.stats(),
+        'lot_choices': lot_choices.stats()
+    }
@@ -0,0 +1,172 @@
+import re
+import threading
+import time
+from bisect import bisect_left
+from models import db, ParkingLot
+from hooks import run_after_commit
+from occupancy import occupancy_index
+
+PREFIX_SCORE = 3
+SUBSTRING_SCORE = 2
+TYPO_SCORE = 1
+
+def tokenize(text):
+    return re.findall(r'[a-z0-9]+', (text or '').lower())
+
+def trigrams(token):
+    return {token[i:i + 3] for i in range(len(token) - 2)}
+
+def padded_trigrams(token):
+    return trigrams(f"  {token} ")
+
+def max_typos(term):
+    if len(term) < 4:
+        return 0
+    return 1 if len(term) < 8 else 2
+
+def within_distance(a, b, limit):
+    if abs(len(a) - len(b)) > limit:
+        return False
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        if min(current) > limit:
+            return False
+        previous = current
+    return previous[-1] <= limit
+
+class LotSearchIndex:
+    def __init__(self, max_age=300):
+        self.lock = threading.RLock()
+        self.max_age = max_age
+        self.loaded_at = None
+        self.lot_tokens = {}
+        self.token_lots = {}
+        self.gram_tokens = {}
+        self.padded_gram_tokens = {}
+        self.sorted_tokens = []
+
+    def rebuild(self):
+        rows = db.session.execute(db.select(ParkingLot.id, ParkingLot.name, ParkingLot.location)).all()
+        with self.lock:
+            self.lot_tokens = {}
+            self.token_lots = {}
+            self.gram_tokens = {}
+            self.padded_gram_tokens = {}
+            for lot_id, name, location in rows:
+                self.add(lot_id, name, location)
+            self.sorted_tokens = sorted(self.token_lots)
+            self.loaded_at = time.monotonic()
+
+    def ensure_loaded(self):
+        if self.loaded_at is None or time.monotonic() - self.loaded_at > self.max_age:
+            self.rebuild()
+
+    def add(self, lot_id, name, location):
+        tokens = set(tokenize(name)) | set(tokenize(location))
+        self.lot_tokens[lot_id] = tokens
+        for token in tokens:
+            if token not in self.token_lots:
+                self.token_lots[token] = set()
+                for gram in trigrams(token):
+                    self.gram_tokens.setdefault(gram, set()).add(token)
+                for gram in padded_trigrams(token):
+                    self.padded_gram_tokens.setdefault(gram, set()).add(token)
+            self.token_lots[token].add(lot_id)
+
+    def remove(self, lot_id):
+        with self.lock:
+            self.discard(lot_id)
+            self.sorted_tokens = sorted(self.token_lots)
+
+    def discard(self, lot_id):
+        with self.lock:
+            for token in self.lot_tokens.pop(lot_id, ()):
+                lots = self.token_lots.get(token)
+                if lots is None:
+                    continue
+                lots.discard(lot_id)
+                if not lots:
+                    del self.token_lots[token]
+                    for gram in trigrams(token):
+                        self.gram_tokens[gram].discard(token)
+                    for gram in padded_trigrams(token):
+                        self.padded_gram_tokens[gram].discard(token)
+
+    def upsert(self, lot_id, name, location):
+        if self.loaded_at is None:
+            return
+        with self.lock:
+            self.discard(lot_id)
+            self.add(lot_id, name, location)
+            self.sorted_tokens = sorted(self.token_lots)
+
+    def prefix_tokens(self, term):
+        position = bisect_left(self.sorted_tokens, term)
+        while position < len(self.sorted_tokens) and self.sorted_tokens[position].startswith(term):
+            yield self.sorted_tokens[position]
+            position += 1
+
+    def substring_tokens(self, term):
+        grams = trigrams(term)
+        if not grams:
+            return set()
+        candidates = set.intersection(*(self.gram_tokens.get(gram, set()) for gram in grams))
+        return {token for token in candidates if term in token}
+
+    def typo_tokens(self, term):
+        limit = max_typos(term)
+        if not limit:
+            return set()
+        grams = padded_trigrams(term)
+        shared = {}
+        for gram in grams:
+            for token in self.padded_gram_tokens.get(gram, ()):
+                shared[token] = shared.get(token, 0) + 1
+        needed = max(1, len(grams) - 3 * limit)
+        return {
+            token for token, count in shared.items()
+            if count >= needed and within_distance(term, token, limit)
+        }
+
+    def term_matches(self, term):
+        scores = {}
+        for score, tokens in ((SUBSTRING_SCORE, self.substring_tokens(term)), (PREFIX_SCORE, self.prefix_tokens(term))):
+            for token in tokens:
+                for lot_id in self.token_lots[token]:
+                    scores[lot_id] = max(scores.get(lot_id, 0), score)
+        if not scores:
+            for token in self.typo_tokens(term):
+                for lot_id in self.token_lots[token]:
+                    scores[lot_id] = TYPO_SCORE
+        return scores
+
+    def search(self, query):
+        terms = tokenize(query)
+        if not terms:
+            return []
+        self.ensure_loaded()
+        with self.lock:
+            scores = None
+            for term in terms:
+                matches = self.term_matches(term)
+                if scores is None:
+                    scores = matches
+                else:
+                    scores = {lot_id: score + matches[lot_id] for lot_id, score in scores.items() if lot_id in matches}
+                if not scores:
+                    return []
+        return sorted(scores, key=lambda lot_id: (-scores[lot_id], -occupancy_index.free_count(lot_id), lot_id))
+
+lot_search_index = LotSearchIndex()
+
+def search_lot_ids(query):
+    return lot_search_index.search(query)
+
+def stage_lot_search(lot_id, name=None, location=None):
+    if name is None:
+        run_after_commit(lot_search_index.remove, lot_id)
+    else:
+        run_after_commit(lot_search_index.upsert, lot_id, name, location)
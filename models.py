@@ -0,0 +1,108 @@
+from flask_sqlalchemy import SQLAlchemy
+from datetime import datetime
+
+db = SQLAlchemy()
+
+class User(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    email = db.Column(db.String(120), unique=True, nullable=False)
+    password = db.Column(db.String(255), nullable=False)
+    fullname = db.Column(db.String(100), nullable=False)
+    address = db.Column(db.String(200), nullable=False)
+    phone = db.Column(db.String(20), nullable=False)
+    pincode = db.Column(db.String(10), nullable=False)
+    summary_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    bookings = db.relationship('Booking', backref='user', lazy=True)
+    __table_args__ = (
+        db.Index('ix_user_fullname_lower', db.func.lower(fullname)),
+        db.Index('ix_user_email_lower', db.func.lower(email)),
+        db.Index('ix_user_phone', phone),
+    )
+
+class ParkingLot(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    location = db.Column(db.String(100), nullable=False)
+    total_spots = db.Column(db.Integer, nullable=False)
+    available_spots = db.Column(db.Integer, nullable=False)
+    price_per_hour = db.Column(db.Float, nullable=False, default=50.0)
+    naming_scheme = db.Column(db.String(20), nullable=False, default='sequential', server_default='sequential')
+    spots_per_row = db.Column(db.Integer)
+    rows_per_level = db.Column(db.Integer)
+    version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    spots = db.relationship('ParkingSpot', backref='parking_lot', lazy=True, cascade='all, delete-orphan')
+
+class ParkingSpot(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    spot_number = db.Column(db.String(10), nullable=False)
+    is_occupied = db.Column(db.Boolean, default=False)
+    parking_lot_id = db.Column(db.Integer, db.ForeignKey('parking_lot.id'), nullable=False)
+    bookings = db.relationship('Booking', backref='parking_spot', lazy=True, cascade='all, delete-orphan')
+    __table_args__ = (
+        db.Index('ix_parking_spot_lot_occupied', parking_lot_id, is_occupied),
+    )
+
+class Booking(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    vehicle_number = db.Column(db.String(20), nullable=False)
+    booking_time = db.Column(db.DateTime, default=datetime.utcnow)
+    release_time = db.Column(db.DateTime)
+    status = db.Column(db.String(20), default='active')
+    total_cost = db.Column(db.Float, default=50.0)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    parking_spot_id = db.Column(db.Integer, db.ForeignKey('parking_spot.id'), nullable=False)
+    parking_lot_id = db.Column(db.Integer, db.ForeignKey('parking_lot.id'), nullable=False)
+    reserved_until = db.Column(db.DateTime)
+    __table_args__ = (
+        db.Index('ix_booking_user_status', user_id, status),
+        db.Index('ix_booking_spot_status_time', parking_spot_id, status, booking_time),
+        db.Index('ix_booking_lot_time', parking_lot_id, booking_time),
+        db.Index('ix_booking_time', booking_time),
+        db.Index('ix_booking_status_reserved_until', status, reserved_until),
+        db.Index('uq_booking_active_user', user_id, unique=True,
+                 sqlite_where=status == 'active', postgresql_where=status == 'active'),
+        db.Index('uq_booking_active_spot', parking_spot_id, unique=True,
+                 sqlite_where=status == 'active', postgresql_where=status == 'active'),
+    )
+
+class DailyLotStats(db.Model):
+    parking_lot_id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    completed_bookings = db.Column(db.Integer, nullable=False, default=0)
+    cancelled_bookings = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0.0)
+    __table_args__ = (
+        db.Index('ix_daily_lot_stats_day', day),
+    )
+
+class DailyUserStats(db.Model):
+    user_id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    completed_bookings = db.Column(db.Integer, nullable=False, default=0)
+    cancelled_bookings = db.Column(db.Integer, nullable=False, default=0)
+    total_spent = db.Column(db.Float, nullable=False, default=0.0)
+
+class OccupancySnapshot(db.Model):
+    parking_lot_id = db.Column(db.Integer, primary_key=True)
+    resolution = db.Column(db.String(4), primary_key=True)
+    taken_at = db.Column(db.DateTime, primary_key=True)
+    occupied_avg = db.Column(db.Float, nullable=False)
+    occupied_max = db.Column(db.Integer, nullable=False)
+    total_spots = db.Column(db.Integer, nullable=False)
+    samples = db.Column(db.Integer, nullable=False, default=1)
+    __table_args__ = (
+        db.Index('ix_occupancy_snapshot_resolution_time', resolution, taken_at),
+    )
+
+class BookingArchive(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    first_booking_id = db.Column(db.Integer, nullable=False)
+    last_booking_id = db.Column(db.Integer, nullable=False)
+    first_booking_time = db.Column(db.DateTime, nullable=False)
+    last_booking_time = db.Column(db.DateTime, nullable=False)
+    rows = db.Column(db.Integer, nullable=False)
+    payload = db.Column(db.LargeBinary, nullable=False)
+    __table_args__ = (
+        db.Index('ix_booking_archive_time', first_booking_time, last_booking_time),
+    )
@@ -0,0 +1,296 @@
+import itertools
+import threading
+import time
+from array import array
+from collections import namedtuple
+from models import db, ParkingLot, ParkingSpot
+from hooks import run_after_commit
+from events import event_hub
+
+FreeSpot = namedtuple('FreeSpot', ['id', 'spot_number'])
+
+CHECK_INTERVAL = 2.0
+MAX_AGE = 300
+
+def lot_versions():
+    with db.engine.connect() as connection:
+        return dict(connection.execute(db.select(ParkingLot.id, ParkingLot.version)).all())
+
+versioned_indexes = []
+
+def bump_lot_versions(*conditions):
+    versions = db.session.execute(
+        db.update(ParkingLot).where(*conditions).values(version=ParkingLot.version + 1)
+        .returning(ParkingLot.id, ParkingLot.version)
+        .execution_options(synchronize_session=False)
+    ).all()
+    run_after_commit(record_lot_versions, versions)
+
+def record_lot_versions(versions):
+    for index in versioned_indexes:
+        index.record_versions(versions)
+
+def spot_lot(spot_id):
+    return db.select(ParkingSpot.parking_lot_id).where(ParkingSpot.id == spot_id).scalar_subquery()
+
+class LotVersionedIndex:
+    def __init__(self, check_interval=CHECK_INTERVAL, max_age=MAX_AGE):
+        self.lock = threading.RLock()
+        self.check_interval = check_interval
+        self.max_age = max_age
+        self.loaded = False
+        self.loaded_at = 0.0
+        self.checked_at = 0.0
+        self.seen_versions = {}
+
+    def mark_loaded(self, versions):
+        self.seen_versions = versions
+        self.loaded_at = self.checked_at = time.monotonic()
+        self.loaded = True
+
+    def ensure_loaded(self):
+        now = time.monotonic()
+        if not self.loaded or now - self.loaded_at > self.max_age:
+            self.rebuild()
+            return
+        with self.lock:
+            if now - self.checked_at <= self.check_interval:
+                return
+            self.checked_at = now
+        self.refresh()
+
+    def record_versions(self, versions):
+        with self.lock:
+            for lot_id, version in versions:
+                if self.seen_versions.get(lot_id) == version - 1:
+                    self.seen_versions[lot_id] = version
+
+    def refresh(self):
+        versions = lot_versions()
+        for lot_id, version in versions.items():
+            if self.seen_versions.get(lot_id) != version:
+                self.reload_lot(lot_id, version)
+        for lot_id in set(self.seen_versions) - set(versions):
+            self.drop_lot(lot_id)
+
+class LotOccupancy:
+    __slots__ = ('spot_ids', 'spot_numbers', 'occupied', 'positions')
+
+    def __init__(self):
+        self.spot_ids = array('q')
+        self.spot_numbers = []
+        self.occupied = bytearray()
+        self.positions = {}
+
+    def append(self, spot_id, spot_number, is_occupied):
+        self.positions[spot_id] = len(self.spot_ids)
+        self.spot_ids.append(spot_id)
+        self.spot_numbers.append(spot_number)
+        self.occupied.append(1 if is_occupied else 0)
+
+    def free_positions(self):
+        position = self.occupied.find(0)
+        while position != -1:
+            yield position
+            position = self.occupied.find(0, position + 1)
+
+    def free_spots(self, exclude=frozenset()):
+        return [
+            FreeSpot(self.spot_ids[i], self.spot_numbers[i])
+            for i in self.free_positions() if self.spot_ids[i] not in exclude
+        ]
+
+    def first_free(self):
+        position = self.occupied.find(0)
+        if position == -1:
+            return None
+        return FreeSpot(self.spot_ids[position], self.spot_numbers[position])
+
+    def free_count(self):
+        return self.occupied.count(0)
+
+    def same_spots_as(self, other):
+        return self.spot_ids == other.spot_ids and self.spot_numbers == other.spot_numbers
+
+    def same_as(self, other):
+        return self.same_spots_as(other) and self.occupied == other.occupied
+
+class OccupancyIndex(LotVersionedIndex):
+    def __init__(self, check_interval=CHECK_INTERVAL, max_age=MAX_AGE):
+        super().__init__(check_interval, max_age)
+        self.lots = {}
+        self.spot_lots = {}
+        self.versions = {}
+        self.counter = itertools.count(1)
+
+    def load_rows(self, rows):
+        lots = {}
+        spot_lots = {}
+        for spot_id, spot_number, is_occupied, lot_id in rows:
+            lot = lots.get(lot_id)
+            if lot is None:
+                lot = lots[lot_id] = LotOccupancy()
+            lot.append(spot_id, spot_number, is_occupied)
+            spot_lots[spot_id] = lot_id
+        return lots, spot_lots
+
+    def fetch(self, lot_id=None):
+        query = db.select(ParkingSpot.id, ParkingSpot.spot_number, ParkingSpot.is_occupied, ParkingSpot.parking_lot_id)
+        if lot_id is not None:
+            query = query.where(ParkingSpot.parking_lot_id == lot_id)
+        query = query.order_by(ParkingSpot.parking_lot_id, ParkingSpot.id).execution_options(yield_per=5000)
+        with db.engine.connect() as connection:
+            return self.load_rows(connection.execute(query))
+
+    def rebuild(self):
+        versions = lot_versions()
+        lots, spot_lots = self.fetch()
+        with self.lock:
+            self.lots = lots
+            self.spot_lots = spot_lots
+            self.versions = {lot_id: next(self.counter) for lot_id in lots}
+            self.mark_loaded(versions)
+        event_hub.publish('reset', {})
+
+    def reload_lot(self, lot_id, version=None):
+        if not self.loaded:
+            return
+        lots, spot_lots = self.fetch(lot_id)
+        with self.lock:
+            if version is not None:
+                self.seen_versions[lot_id] = version
+            current = self.lots.get(lot_id)
+            fresh = lots.get(lot_id)
+            if current is not None and fresh is not None and current.same_as(fresh):
+                return
+            changed = current is not None and fresh is not None and current.same_spots_as(fresh)
+            self.forget_lot(lot_id)
+            self.lots.update(lots)
+            self.spot_lots.update(spot_lots)
+            if fresh is not None:
+                self.versions[lot_id] = next(self.counter)
+        if not changed:
+            event_hub.publish('lot', {'lot_id': lot_id})
+            return
+        free = fresh.free_count()
+        for position, (was, now) in enumerate(zip(current.occupied, fresh.occupied)):
+            if was != now:
+                event_hub.publish('spot', {
+                    'spot_id': fresh.spot_ids[position],
+                    'lot_id': lot_id,
+                    'occupied': bool(now),
+                    'free': free,
+                    'total': len(fresh.spot_ids)
+                })
+
+    def forget_lot(self, lot_id):
+        with self.lock:
+            lot = self.lots.pop(lot_id, None)
+            self.versions.pop(lot_id, None)
+            if lot:
+                for spot_id in lot.spot_ids:
+                    self.spot_lots.pop(spot_id, None)
+
+    def drop_lot(self, lot_id):
+        self.forget_lot(lot_id)
+        self.seen_versions.pop(lot_id, None)
+        event_hub.publish('lot', {'lot_id': lot_id})
+
+    def mark(self, spot_id, is_occupied):
+        with self.lock:
+            lot_id = self.spot_lots.get(spot_id)
+            if lot_id is None:
+                return
+            lot = self.lots[lot_id]
+            position = lot.positions[spot_id]
+            if lot.occupied[position] == is_occupied:
+                return
+            lot.occupied[position] = 1 if is_occupied else 0
+            self.versions[lot_id] = next(self.counter)
+            free = lot.free_count()
+        event_hub.publish('spot', {
+            'spot_id': spot_id,
+            'lot_id': lot_id,
+            'occupied': bool(is_occupied),
+            'free': free,
+            'total': len(lot.spot_ids)
+        })
+
+    def rename(self, spot_id, spot_number):
+        with self.lock:
+            lot_id = self.spot_lots.get(spot_id)
+            if lot_id is None:
+                return
+            lot = self.lots[lot_id]
+            lot.spot_numbers[lot.positions[spot_id]] = spot_number
+            self.versions[lot_id] = next(self.counter)
+
+    def free_spots(self, lot_id, exclude=frozenset()):
+        self.ensure_loaded()
+        with self.lock:
+            lot = self.lots.get(lot_id)
+            return lot.free_spots(exclude) if lot else []
+
+    def first_free(self, lot_id):
+        self.ensure_loaded()
+        with self.lock:
+            lot = self.lots.get(lot_id)
+            return lot.first_free() if lot else None
+
+    def free_count(self, lot_id):
+        self.ensure_loaded()
+        with self.lock:
+            lot = self.lots.get(lot_id)
+            return lot.free_count() if lot else 0
+
+    def version(self, lot_id):
+        self.ensure_loaded()
+        with self.lock:
+            return self.versions.get(lot_id)
+
+    def spot_grid(self, lot_id):
+        self.ensure_loaded()
+        with self.lock:
+            lot = self.lots.get(lot_id)
+            if not lot:
+                return None, []
+            return self.versions[lot_id], [
+                (spot_id, spot_number, bool(occupied))
+                for spot_id, spot_number, occupied in zip(lot.spot_ids, lot.spot_numbers, lot.occupied)
+            ]
+
+    def check_consistency(self):
+        self.ensure_loaded()
+        actual_lots, actual_spot_lots = self.fetch()
+        problems = []
+        with self.lock:
+            for spot_id, lot_id in actual_spot_lots.items():
+                actual_lot = actual_lots[lot_id]
+                is_occupied = bool(actual_lot.occupied[actual_lot.positions[spot_id]])
+                indexed_lot_id = self.spot_lots.get(spot_id)
+                if indexed_lot_id is None:
+                    problems.append({'spot_id': spot_id, 'lot_id': lot_id, 'problem': 'missing from index'})
+                    continue
+                indexed_lot = self.lots[indexed_lot_id]
+                indexed = bool(indexed_lot.occupied[indexed_lot.positions[spot_id]])
+                if indexed_lot_id != lot_id:
+                    problems.append({'spot_id': spot_id, 'lot_id': lot_id, 'problem': f"indexed under lot {indexed_lot_id}"})
+                elif indexed != is_occupied:
+                    problems.append({'spot_id': spot_id, 'lot_id': lot_id,
+                                     'problem': f"index says occupied={indexed}, database says occupied={is_occupied}"})
+            for spot_id, lot_id in self.spot_lots.items():
+                if spot_id not in actual_spot_lots:
+                    problems.append({'spot_id': spot_id, 'lot_id': lot_id, 'problem': 'no longer in database'})
+        return problems
+
+occupancy_index = OccupancyIndex()
+versioned_indexes.append(occupancy_index)
+
+def stage_occupancy(action, *args):
+    if action in ('mark', 'rename'):
+        bump_lot_versions(ParkingLot.id == spot_lot(args[0]))
+    elif action == 'rebuild':
+        bump_lot_versions()
+    else:
+        bump_lot_versions(ParkingLot.id == args[0])
+    run_after_commit(getattr(occupancy_index, action), *args)
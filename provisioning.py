@@ -0,0 +1,86 @@
+from string import ascii_uppercase
+from models import db, Booking, ParkingSpot
+
+NAMING_SCHEMES = [
+    ('sequential', 'Sequential (A01, A02, ...)'),
+    ('rows', 'Rows (A01..A20, B01..B20, ...)'),
+    ('levels', 'Levels and rows (1A01, 1B01, ..., 2A01, ...)')
+]
+
+DELETE_CHUNK_SIZE = 500
+
+def row_label(index):
+    label = ''
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        label = ascii_uppercase[remainder] + label
+    return label
+
+def spot_name(position, scheme='sequential', spots_per_row=None, rows_per_level=None):
+    if scheme == 'sequential' or not spots_per_row:
+        return f"A{position:02d}"
+    offset = position - 1
+    row, number = divmod(offset, spots_per_row)
+    if scheme == 'levels' and rows_per_level:
+        level, row = divmod(row, rows_per_level)
+        return f"{level + 1}{row_label(row)}{number + 1:02d}"
+    return f"{row_label(row)}{number + 1:02d}"
+
+def free_spot_names(lot_id, count, scheme='sequential', spots_per_row=None, rows_per_level=None):
+    taken = set(db.session.execute(
+        db.select(ParkingSpot.spot_number).where(ParkingSpot.parking_lot_id == lot_id)
+    ).scalars())
+    names = []
+    position = 1
+    while len(names) < count:
+        name = spot_name(position, scheme, spots_per_row, rows_per_level)
+        if name not in taken:
+            names.append(name)
+        position += 1
+    return names
+
+def provision_spots(lot, count):
+    if count <= 0:
+        return 0
+    names = free_spot_names(lot.id, count, lot.naming_scheme, lot.spots_per_row, lot.rows_per_level)
+    db.session.execute(db.insert(ParkingSpot), [
+        {'spot_number': name, 'parking_lot_id': lot.id, 'is_occupied': False}
+        for name in names
+    ])
+    return count
+
+def free_spots_for_removal(lot_id, count):
+    return db.session.execute(
+        db.select(ParkingSpot.id)
+        .where(
+            ParkingSpot.parking_lot_id == lot_id, ParkingSpot.is_occupied == False,
+            ParkingSpot.id.not_in(db.select(Booking.parking_spot_id).where(Booking.status == 'reserved'))
+        )
+        .order_by(ParkingSpot.id.desc())
+        .limit(count)
+    ).scalars().all()
+
+def remove_spots(spot_ids):
+    removed = 0
+    for i in range(0, len(spot_ids), DELETE_CHUNK_SIZE):
+        chunk = db.session.execute(
+            db.update(ParkingSpot)
+            .where(
+                ParkingSpot.id.in_(spot_ids[i:i + DELETE_CHUNK_SIZE]), ParkingSpot.is_occupied == False,
+                ParkingSpot.id.not_in(db.select(Booking.parking_spot_id).where(Booking.status == 'reserved'))
+            )
+            .values(is_occupied=True)
+            .returning(ParkingSpot.id)
+            .execution_options(synchronize_session=False)
+        ).scalars().all()
+        if not chunk:
+            continue
+        db.session.execute(
+            db.delete(Booking).where(Booking.parking_spot_id.in_(chunk)).execution_options(synchronize_session=False)
+        )
+        db.session.execute(
+            db.delete(ParkingSpot).where(ParkingSpot.id.in_(chunk)).execution_options(synchronize_session=False)
+        )
+        removed += len(chunk)
+    return removed
@@ -0,0 +1,147 @@
+from datetime import datetime, timedelta
+from models import db, User, ParkingLot, ParkingSpot, Booking, DailyUserStats
+from rollups import active_bookings, lot_booking_totals
+
+PAGE_SIZE = 50
+USER_PAGE_SIZE = 50
+
+def encode_cursor(booking):
+    return f"{booking.booking_time.strftime('%Y%m%d%H%M%S%f')}-{booking.id}"
+
+def decode_cursor(cursor):
+    try:
+        timestamp, booking_id = cursor.split('-', 1)
+        return datetime.strptime(timestamp, '%Y%m%d%H%M%S%f'), int(booking_id)
+    except (AttributeError, ValueError):
+        return None
+
+def booking_filters(lot_id=None, user_email=None, status=None, date_from=None, date_to=None):
+    conditions = []
+    if lot_id:
+        conditions.append(Booking.parking_lot_id == lot_id)
+    if user_email:
+        conditions.append(Booking.user_id == db.select(User.id).where(User.email == user_email).scalar_subquery())
+    if status:
+        conditions.append(Booking.status == status)
+    if date_from:
+        conditions.append(Booking.booking_time >= datetime.combine(date_from, datetime.min.time()))
+    if date_to:
+        conditions.append(Booking.booking_time < datetime.combine(date_to + timedelta(days=1), datetime.min.time()))
+    return conditions
+
+def booking_page(conditions, after=None, before=None, page_size=PAGE_SIZE):
+    query = db.select(Booking, User, ParkingSpot, ParkingLot).join(
+        User, Booking.user_id == User.id
+    ).join(
+        ParkingSpot, Booking.parking_spot_id == ParkingSpot.id
+    ).join(
+        ParkingLot, Booking.parking_lot_id == ParkingLot.id
+    ).where(*conditions)
+    position = decode_cursor(before) if before else decode_cursor(after) if after else None
+    key = db.tuple_(Booking.booking_time, Booking.id)
+    if before and position:
+        query = query.where(key > position).order_by(Booking.booking_time.asc(), Booking.id.asc())
+    else:
+        if position:
+            query = query.where(key < position)
+        query = query.order_by(Booking.booking_time.desc(), Booking.id.desc())
+    rows = db.session.execute(query.limit(page_size + 1)).all()
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if before and position:
+        rows.reverse()
+        newer = encode_cursor(rows[0][0]) if rows and has_more else None
+        older = encode_cursor(rows[-1][0]) if rows else None
+    else:
+        newer = encode_cursor(rows[0][0]) if rows and position else None
+        older = encode_cursor(rows[-1][0]) if rows and has_more else None
+    return rows, newer, older
+
+def status_count(status):
+    return db.func.coalesce(db.func.sum(db.case((Booking.status == status, 1), else_=0)), 0)
+
+def booking_totals(filters):
+    if filters.get('user_email'):
+        stats = live_booking_totals(booking_filters(**filters))
+    else:
+        stats = lot_booking_totals(
+            lot_id=filters.get('lot_id'),
+            status=filters.get('status'),
+            date_from=filters.get('date_from'),
+            date_to=filters.get('date_to')
+        )
+    stats.update(db.session.execute(db.select(
+        (db.select(db.func.count(User.id)).scalar_subquery() - 1).label('total_users'),
+        db.select(db.func.count(ParkingLot.id)).scalar_subquery().label('total_lots'),
+        db.select(db.func.count(ParkingSpot.id)).scalar_subquery().label('total_spots')
+    )).one()._mapping)
+    return stats
+
+def live_booking_totals(conditions):
+    row = db.session.execute(db.select(
+        db.func.count(Booking.id).label('total_bookings'),
+        status_count('active').label('active_bookings'),
+        status_count('completed').label('completed_bookings'),
+        status_count('cancelled').label('cancelled_bookings'),
+        status_count('reserved').label('reserved_bookings'),
+        db.func.coalesce(
+            db.func.sum(db.case((Booking.status == 'completed', Booking.total_cost), else_=0)), 0
+        ).label('total_revenue')
+    ).where(*conditions)).one()
+    return dict(row._mapping)
+
+def prefix_match(column, term):
+    return db.and_(column >= term, column < term + '\uffff')
+
+def user_search_conditions(search):
+    term = search.strip().lower()
+    if not term:
+        return []
+    return [db.or_(
+        prefix_match(db.func.lower(User.fullname), term),
+        prefix_match(db.func.lower(User.email), term),
+        prefix_match(User.phone, term)
+    )]
+
+def user_page(search='', after=None, before=None, page_size=USER_PAGE_SIZE):
+    page_ids = db.select(User.id).where(User.id != 1, *user_search_conditions(search))
+    if before:
+        page_ids = page_ids.where(User.id < before).order_by(User.id.desc())
+    else:
+        if after:
+            page_ids = page_ids.where(User.id > after)
+        page_ids = page_ids.order_by(User.id.asc())
+    page_ids = page_ids.limit(page_size + 1).subquery()
+    rows = db.session.execute(
+        db.select(
+            User,
+            db.func.count(Booking.id),
+            db.func.coalesce(db.func.sum(db.case((Booking.status == 'active', 1), else_=0)), 0)
+        ).join(
+            page_ids, User.id == page_ids.c.id
+        ).outerjoin(
+            Booking, Booking.user_id == User.id
+        ).group_by(User.id).order_by(User.id)
+    ).all()
+    has_more = len(rows) > page_size
+    if before:
+        rows = rows[1:] if has_more else rows
+        previous_cursor = rows[0][0].id if rows and has_more else None
+        next_cursor = rows[-1][0].id if rows else None
+    else:
+        rows = rows[:page_size]
+        previous_cursor = rows[0][0].id if rows and after else None
+        next_cursor = rows[-1][0].id if rows and has_more else None
+    return rows, previous_cursor, next_cursor
+
+def user_totals():
+    closed = db.select(
+        db.func.coalesce(db.func.sum(DailyUserStats.completed_bookings + DailyUserStats.cancelled_bookings), 0)
+    ).where(DailyUserStats.user_id != 1).scalar_subquery()
+    active = active_bookings(Booking.user_id != 1)
+    row = db.session.execute(db.select(
+        db.select(db.func.count(User.id)).where(User.id != 1).scalar_subquery().label('total_users'),
+        active.label('active_bookings'),
+        (closed + active).label('total_bookings')
+    )).one()
+    return dict(row._mapping)
@@ -0,0 +1,283 @@
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from models import db, Booking, ParkingLot, ParkingSpot
+from allocation import RESERVATION_HOLD, AllocationError, claim_spot
+from database import retry_on_conflict
+from hooks import run_after_commit
+from occupancy import (
+    CHECK_INTERVAL, MAX_AGE, LotVersionedIndex, bump_lot_versions, lot_versions, occupancy_index, versioned_indexes
+)
+from rollups import record_closed_booking
+from user_summary import forget_user_summary
+
+MAX_RESERVATION_LENGTH = timedelta(days=7)
+MAX_RESERVATION_AHEAD = timedelta(days=90)
+RESERVATION_CANDIDATES = 5
+EXPIRE_CHUNK_SIZE = 500
+
+class SpotReservations:
+    __slots__ = ('starts', 'ends', 'booking_ids')
+
+    def __init__(self):
+        self.starts = []
+        self.ends = []
+        self.booking_ids = []
+
+    def add(self, booking_id, start, end):
+        position = bisect_right(self.starts, start)
+        self.starts.insert(position, start)
+        self.ends.insert(position, end)
+        self.booking_ids.insert(position, booking_id)
+
+    def remove(self, booking_id):
+        position = self.booking_ids.index(booking_id)
+        del self.starts[position]
+        del self.ends[position]
+        del self.booking_ids[position]
+
+class ReservationIndex(LotVersionedIndex):
+    def __init__(self, check_interval=CHECK_INTERVAL, max_age=MAX_AGE):
+        super().__init__(check_interval, max_age)
+        self.lots = {}
+        self.bookings = {}
+
+    def fetch(self, lot_id=None):
+        query = db.select(
+            Booking.id, Booking.parking_lot_id, Booking.parking_spot_id, Booking.booking_time, Booking.reserved_until
+        ).where(Booking.status == 'reserved', Booking.reserved_until > datetime.utcnow())
+        if lot_id is not None:
+            query = query.where(Booking.parking_lot_id == lot_id)
+        query = query.order_by(Booking.parking_spot_id, Booking.booking_time).execution_options(yield_per=5000)
+        lots = {}
+        bookings = {}
+        with db.engine.connect() as connection:
+            for booking_id, lot_id, spot_id, start, end in connection.execute(query):
+                spots = lots.setdefault(lot_id, {})
+                spot = spots.get(spot_id)
+                if spot is None:
+                    spot = spots[spot_id] = SpotReservations()
+                spot.starts.append(start)
+                spot.ends.append(end)
+                spot.booking_ids.append(booking_id)
+                bookings[booking_id] = (lot_id, spot_id)
+        return lots, bookings
+
+    def rebuild(self):
+        versions = lot_versions()
+        lots, bookings = self.fetch()
+        with self.lock:
+            self.lots = lots
+            self.bookings = bookings
+            self.mark_loaded(versions)
+
+    def reload_lot(self, lot_id, version=None):
+        if not self.loaded:
+            return
+        lots, bookings = self.fetch(lot_id)
+        with self.lock:
+            if version is not None:
+                self.seen_versions[lot_id] = version
+            self.forget_lot(lot_id)
+            self.lots.update(lots)
+            self.bookings.update(bookings)
+
+    def add(self, booking_id, lot_id, spot_id, start, end):
+        if not self.loaded:
+            return
+        with self.lock:
+            spots = self.lots.setdefault(lot_id, {})
+            spot = spots.get(spot_id)
+            if spot is None:
+                spot = spots[spot_id] = SpotReservations()
+            spot.add(booking_id, start, end)
+            self.bookings[booking_id] = (lot_id, spot_id)
+
+    def remove(self, booking_id):
+        with self.lock:
+            lot_id, spot_id = self.bookings.pop(booking_id, (None, None))
+            if lot_id is None:
+                return
+            spots = self.lots[lot_id]
+            spots[spot_id].remove(booking_id)
+            if not spots[spot_id].booking_ids:
+                del spots[spot_id]
+
+    def forget_lot(self, lot_id):
+        with self.lock:
+            for spot in self.lots.pop(lot_id, {}).values():
+                for booking_id in spot.booking_ids:
+                    self.bookings.pop(booking_id, None)
+
+    def drop_lot(self, lot_id):
+        self.forget_lot(lot_id)
+        self.seen_versions.pop(lot_id, None)
+
+    def reserved_spot_ids(self, lot_id, start, end):
+        self.ensure_loaded()
+        reserved = set()
+        with self.lock:
+            for spot_id, spot in self.lots.get(lot_id, {}).items():
+                position = bisect_left(spot.starts, end)
+                if position and spot.ends[position - 1] > start:
+                    reserved.add(spot_id)
+        return reserved
+
+    def reservation_count(self, lot_id=None):
+        self.ensure_loaded()
+        with self.lock:
+            if lot_id is None:
+                return len(self.bookings)
+            return sum(len(spot.booking_ids) for spot in self.lots.get(lot_id, {}).values())
+
+reservation_index = ReservationIndex()
+versioned_indexes.append(reservation_index)
+
+def booking_lot(booking_id):
+    return db.select(Booking.parking_lot_id).where(Booking.id == booking_id).scalar_subquery()
+
+def stage_reservation(action, *args):
+    if action == 'add':
+        bump_lot_versions(ParkingLot.id == args[1])
+    elif action == 'remove':
+        bump_lot_versions(ParkingLot.id == booking_lot(args[0]))
+    else:
+        bump_lot_versions(ParkingLot.id == args[0])
+    run_after_commit(getattr(reservation_index, action), *args)
+
+def available_spots(lot_id, start, end):
+    return occupancy_index.free_spots(lot_id, exclude=reservation_index.reserved_spot_ids(lot_id, start, end))
+
+def bookable_spots(lot_id):
+    now = datetime.utcnow()
+    return available_spots(lot_id, now, now + RESERVATION_HOLD)
+
+def check_window(start, end, now=None):
+    now = now or datetime.utcnow()
+    if start >= end:
+        raise AllocationError('The reservation must end after it starts.')
+    if start < now:
+        raise AllocationError('The reservation must start in the future.')
+    if end - start > MAX_RESERVATION_LENGTH:
+        raise AllocationError(f'Reservations can be at most {MAX_RESERVATION_LENGTH.days} days long.')
+    if start > now + MAX_RESERVATION_AHEAD:
+        raise AllocationError(f'Reservations can start at most {MAX_RESERVATION_AHEAD.days} days ahead.')
+
+def overlapping_reservation(spot_id, start, end):
+    return db.session.execute(
+        db.select(Booking.id).where(
+            Booking.parking_spot_id == spot_id, Booking.status == 'reserved',
+            Booking.booking_time < end, Booking.reserved_until > start
+        ).limit(1)
+    ).scalar()
+
+def lock_spot(lot_id, spot_id):
+    return db.session.execute(
+        db.update(ParkingSpot)
+        .where(ParkingSpot.id == spot_id, ParkingSpot.parking_lot_id == lot_id)
+        .values(spot_number=ParkingSpot.spot_number)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+def place_reservation(user_id, lot_id, vehicle_number, start, end, spot_id=None):
+    lot = db.session.get(ParkingLot, lot_id)
+    if not lot:
+        raise AllocationError('Selected parking lot does not exist.')
+    if spot_id is not None:
+        candidates = [spot_id]
+    else:
+        candidates = [spot.id for spot in available_spots(lot_id, start, end)[:RESERVATION_CANDIDATES]]
+    for candidate_id in candidates:
+        if not lock_spot(lot_id, candidate_id) or overlapping_reservation(candidate_id, start, end):
+            continue
+        booking = Booking(
+            user_id=user_id,
+            parking_spot_id=candidate_id,
+            parking_lot_id=lot_id,
+            vehicle_number=vehicle_number.upper(),
+            booking_time=start,
+            reserved_until=end,
+            status='reserved',
+            total_cost=lot.price_per_hour
+        )
+        db.session.add(booking)
+        db.session.flush()
+        stage_reservation('add', booking.id, lot_id, candidate_id, start, end)
+        forget_user_summary(user_id)
+        db.session.commit()
+        return booking
+    db.session.rollback()
+    if spot_id is not None:
+        raise AllocationError('Selected parking spot is already reserved for part of this time.')
+    raise AllocationError('No spots in this parking lot are free for the whole of this time.')
+
+def reserve_spot(user_id, lot_id, vehicle_number, start, end, spot_id=None):
+    check_window(start, end)
+    try:
+        return retry_on_conflict(lambda: place_reservation(user_id, lot_id, vehicle_number, start, end, spot_id))
+    except SQLAlchemyError:
+        db.session.rollback()
+        raise AllocationError('An error occurred while reserving. Please try again.')
+
+def close_reservation(booking, closed_at):
+    booking.status = 'cancelled'
+    booking.release_time = closed_at
+    record_closed_booking(booking)
+    forget_user_summary(booking.user_id)
+    stage_reservation('remove', booking.id)
+
+def cancel_reservation(booking_id):
+    def cancel():
+        booking = db.session.get(Booking, booking_id)
+        if booking is None or booking.status != 'reserved':
+            raise AllocationError('Reservation is not open.')
+        close_reservation(booking, datetime.utcnow())
+        db.session.commit()
+        return booking
+    try:
+        return retry_on_conflict(cancel)
+    except SQLAlchemyError:
+        db.session.rollback()
+        raise AllocationError('An error occurred while cancelling the reservation. Please try again.')
+
+def check_in(booking_id):
+    def start_parking():
+        booking = db.session.get(Booking, booking_id)
+        if booking is None or booking.status != 'reserved':
+            raise AllocationError('Reservation is not open.')
+        now = datetime.utcnow()
+        if now < booking.booking_time - RESERVATION_HOLD:
+            raise AllocationError(f"Check-in opens at {(booking.booking_time - RESERVATION_HOLD).strftime('%Y-%m-%d %H:%M')}.")
+        if now >= booking.reserved_until:
+            raise AllocationError('This reservation has ended.')
+        if claim_spot(booking.parking_lot_id, booking.parking_spot_id, reservation_id=booking.id) is None:
+            db.session.rollback()
+            raise AllocationError('The reserved spot is still occupied. Please ask the attendant for help.')
+        booking.status = 'active'
+        booking.booking_time = now
+        forget_user_summary(booking.user_id)
+        stage_reservation('remove', booking.id)
+        db.session.commit()
+        return booking
+    try:
+        return retry_on_conflict(start_parking)
+    except IntegrityError:
+        db.session.rollback()
+        raise AllocationError('You already have an active booking. Please release it first.')
+    except SQLAlchemyError:
+        db.session.rollback()
+        raise AllocationError('An error occurred while checking in. Please try again.')
+
+def expire_reservations(now=None):
+    now = now or datetime.utcnow()
+    expired = 0
+    while True:
+        bookings = Booking.query.filter(
+            Booking.status == 'reserved', Booking.reserved_until <= now
+        ).order_by(Booking.id).limit(EXPIRE_CHUNK_SIZE).all()
+        if not bookings:
+            return expired
+        for booking in bookings:
+            close_reservation(booking, booking.reserved_until)
+        db.session.commit()
+        expired += len(bookings)
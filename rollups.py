@@ -0,0 +1,159 @@
+from datetime import date, datetime, timedelta
+from sqlalchemy.dialects import postgresql, sqlite
+from models import db, Booking, BookingArchive, DailyLotStats, DailyUserStats
+
+def increment(model, keys, amounts):
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        insert = sqlite.insert if dialect == 'sqlite' else postgresql.insert
+        statement = insert(model).values(**keys, **amounts)
+        statement = statement.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={name: getattr(model, name) + statement.excluded[name] for name in amounts}
+        )
+        db.session.execute(statement)
+        return
+    updated = db.session.execute(
+        db.update(model)
+        .where(*[getattr(model, name) == value for name, value in keys.items()])
+        .values({name: getattr(model, name) + value for name, value in amounts.items()})
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not updated:
+        db.session.execute(db.insert(model).values(**keys, **amounts))
+
+def record_closed_booking(booking):
+    if booking.status not in ('completed', 'cancelled') or not booking.booking_time:
+        return
+    completed = 1 if booking.status == 'completed' else 0
+    cost = booking.total_cost if completed else 0.0
+    day = booking.booking_time.date()
+    increment(DailyLotStats, {'parking_lot_id': booking.parking_lot_id, 'day': day}, {
+        'completed_bookings': completed,
+        'cancelled_bookings': 1 - completed,
+        'revenue': cost
+    })
+    increment(DailyUserStats, {'user_id': booking.user_id, 'day': day}, {
+        'completed_bookings': completed,
+        'cancelled_bookings': 1 - completed,
+        'total_spent': cost
+    })
+
+def forget_user_bookings(booking_ids):
+    totals = {}
+    rows = db.session.execute(
+        db.select(Booking.user_id, Booking.booking_time, Booking.status, Booking.total_cost).where(
+            Booking.id.in_(booking_ids), Booking.status.in_(['completed', 'cancelled']), Booking.booking_time.is_not(None)
+        )
+    ).all()
+    for user_id, booking_time, status, total_cost in rows:
+        completed, cancelled, spent = totals.get((user_id, booking_time.date()), (0, 0, 0.0))
+        if status == 'completed':
+            completed, spent = completed + 1, spent + total_cost
+        else:
+            cancelled += 1
+        totals[user_id, booking_time.date()] = (completed, cancelled, spent)
+    for (user_id, day), (completed, cancelled, spent) in totals.items():
+        increment(DailyUserStats, {'user_id': user_id, 'day': day}, {
+            'completed_bookings': -completed,
+            'cancelled_bookings': -cancelled,
+            'total_spent': -spent
+        })
+    return {user_id for user_id, _ in totals}
+
+def closed_bookings(status):
+    return db.func.sum(db.case((Booking.status == status, 1), else_=0))
+
+def booking_time_bounds(date_from=None, date_to=None):
+    conditions = []
+    if date_from:
+        conditions.append(Booking.booking_time >= datetime.combine(date_from, datetime.min.time()))
+    if date_to:
+        conditions.append(Booking.booking_time < datetime.combine(date_to + timedelta(days=1), datetime.min.time()))
+    return conditions
+
+def backfill_rollups(date_from=None, date_to=None):
+    archived_through = db.session.execute(db.select(db.func.max(BookingArchive.last_booking_time))).scalar()
+    if archived_through:
+        date_from = max(date_from or date.min, archived_through.date() + timedelta(days=1))
+    if date_to and date_from and date_from > date_to:
+        return {'lot_days': 0, 'user_days': 0, 'kept_before': date_from}
+    day = db.func.date(Booking.booking_time)
+    conditions = [Booking.status.in_(['completed', 'cancelled'])] + booking_time_bounds(date_from, date_to)
+    for model in (DailyLotStats, DailyUserStats):
+        stale = db.delete(model)
+        if date_from:
+            stale = stale.where(model.day >= date_from)
+        if date_to:
+            stale = stale.where(model.day <= date_to)
+        db.session.execute(stale.execution_options(synchronize_session=False))
+    revenue = db.func.coalesce(db.func.sum(db.case((Booking.status == 'completed', Booking.total_cost), else_=0)), 0)
+    db.session.execute(db.insert(DailyLotStats).from_select(
+        ['parking_lot_id', 'day', 'completed_bookings', 'cancelled_bookings', 'revenue'],
+        db.select(Booking.parking_lot_id, day, closed_bookings('completed'), closed_bookings('cancelled'), revenue)
+        .where(*conditions).group_by(Booking.parking_lot_id, day)
+    ))
+    db.session.execute(db.insert(DailyUserStats).from_select(
+        ['user_id', 'day', 'completed_bookings', 'cancelled_bookings', 'total_spent'],
+        db.select(Booking.user_id, day, closed_bookings('completed'), closed_bookings('cancelled'), revenue)
+        .where(*conditions).group_by(Booking.user_id, day)
+    ))
+    db.session.commit()
+    return {
+        'lot_days': db.session.query(DailyLotStats).count(),
+        'user_days': db.session.query(DailyUserStats).count(),
+        'kept_before': date_from if archived_through else None
+    }
+
+def open_bookings(status, *conditions):
+    return db.select(db.func.count(Booking.id)).where(Booking.status == status, *conditions).scalar_subquery()
+
+def active_bookings(*conditions):
+    return open_bookings('active', *conditions)
+
+def user_booking_stats(user_id):
+    row = db.session.execute(db.select(
+        db.func.coalesce(db.func.sum(DailyUserStats.completed_bookings), 0),
+        db.func.coalesce(db.func.sum(DailyUserStats.cancelled_bookings), 0),
+        db.func.coalesce(db.func.sum(DailyUserStats.total_spent), 0),
+        active_bookings(Booking.user_id == user_id)
+    ).where(DailyUserStats.user_id == user_id)).one()
+    completed, cancelled, total_spent, active = row
+    return {
+        'total_bookings': completed + cancelled + active,
+        'completed_bookings': completed,
+        'cancelled_bookings': cancelled,
+        'total_spent': total_spent
+    }
+
+def lot_booking_totals(lot_id=None, status=None, date_from=None, date_to=None):
+    conditions = []
+    active_conditions = booking_time_bounds(date_from, date_to)
+    if lot_id:
+        conditions.append(DailyLotStats.parking_lot_id == lot_id)
+        active_conditions.append(Booking.parking_lot_id == lot_id)
+    if date_from:
+        conditions.append(DailyLotStats.day >= date_from)
+    if date_to:
+        conditions.append(DailyLotStats.day <= date_to)
+    completed, cancelled, revenue, active, reserved = db.session.execute(db.select(
+        db.func.coalesce(db.func.sum(DailyLotStats.completed_bookings), 0),
+        db.func.coalesce(db.func.sum(DailyLotStats.cancelled_bookings), 0),
+        db.func.coalesce(db.func.sum(DailyLotStats.revenue), 0),
+        active_bookings(*active_conditions),
+        open_bookings('reserved', *active_conditions)
+    ).where(*conditions)).one()
+    if status:
+        completed = completed if status == 'completed' else 0
+        cancelled = cancelled if status == 'cancelled' else 0
+        active = active if status == 'active' else 0
+        reserved = reserved if status == 'reserved' else 0
+        revenue = revenue if status == 'completed' else 0
+    return {
+        'total_bookings': completed + cancelled + active + reserved,
+        'active_bookings': active,
+        'reserved_bookings': reserved,
+        'completed_bookings': completed,
+        'cancelled_bookings': cancelled,
+        'total_revenue': revenue
+    }
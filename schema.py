@@ -0,0 +1,102 @@
+from sqlalchemy.schema import CreateIndex
+from models import db, User, ParkingLot, ParkingSpot, Booking, DailyUserStats
+from rollups import backfill_rollups
+from auth import hash_password
+
+def find_duplicate_active_bookings(column):
+    return db.session.query(column).filter(Booking.status == 'active').group_by(column).having(
+        db.func.count(Booking.id) > 1
+    ).all()
+
+def add_missing_columns():
+    inspector = db.inspect(db.engine)
+    added = []
+    for table in db.metadata.sorted_tables:
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            definition = column.type.compile(db.engine.dialect)
+            if column.server_default is not None:
+                default = str(column.server_default.arg).replace("'", "''")
+                definition += f" NOT NULL DEFAULT '{default}'"
+            with db.engine.begin() as connection:
+                connection.execute(db.text(f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {definition}'))
+            added.append(f'{table.name}.{column.name}')
+    return added
+
+SUPERSEDED_INDEXES = {
+    'booking': ['ix_booking_lot', 'ix_booking_spot_status']
+}
+
+def drop_superseded_indexes():
+    inspector = db.inspect(db.engine)
+    dropped = []
+    for table_name, names in SUPERSEDED_INDEXES.items():
+        existing = {index['name'] for index in inspector.get_indexes(table_name)}
+        for name in names:
+            if name not in existing:
+                continue
+            with db.engine.begin() as connection:
+                connection.execute(db.text(f'DROP INDEX IF EXISTS "{name}"'))
+            dropped.append(name)
+    return dropped
+
+def migrate_indexes():
+    db.create_all()
+    report = {'added_columns': add_missing_columns(), 'dropped': drop_superseded_indexes(), 'skipped': {}, 'created': []}
+    duplicates = {
+        'uq_booking_active_user': find_duplicate_active_bookings(Booking.user_id),
+        'uq_booking_active_spot': find_duplicate_active_bookings(Booking.parking_spot_id)
+    }
+    for table in db.metadata.sorted_tables:
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            if duplicates.get(index.name):
+                report['skipped'][index.name] = [row[0] for row in duplicates[index.name]]
+                continue
+            with db.engine.begin() as connection:
+                connection.execute(CreateIndex(index, if_not_exists=True))
+            report['created'].append(index.name)
+    return report
+
+SAMPLE_LOTS = [
+    {'name': 'City Mall Parking', 'location': 'Mall', 'total_spots': 20, 'available_spots': 15, 'price_per_hour': 50.0},
+    {'name': 'Airport Parking', 'location': 'Airport', 'total_spots': 15, 'available_spots': 8, 'price_per_hour': 75.0},
+    {'name': 'Downtown Plaza', 'location': 'Downtown', 'total_spots': 10, 'available_spots': 3, 'price_per_hour': 60.0},
+    {'name': 'Shopping Center', 'location': 'Mall', 'total_spots': 18, 'available_spots': 12, 'price_per_hour': 45.0},
+    {'name': 'Business District', 'location': 'Downtown', 'total_spots': 12, 'available_spots': 6, 'price_per_hour': 80.0}
+]
+
+def create_schema():
+    report = migrate_indexes()
+    if not DailyUserStats.query.first() and Booking.query.filter(Booking.status != 'active').first():
+        backfill_rollups()
+    return report
+
+def seed_sample_data():
+    seeded = {'lots': 0, 'spots': 0, 'admin': False}
+    if ParkingLot.query.first():
+        return seeded
+    db.session.execute(db.insert(ParkingLot), SAMPLE_LOTS)
+    lots = db.session.execute(
+        db.select(ParkingLot.id, ParkingLot.total_spots, ParkingLot.available_spots).order_by(ParkingLot.id)
+    ).all()
+    spots = [
+        {'spot_number': f"A{i:02d}", 'parking_lot_id': lot_id, 'is_occupied': i > available_spots}
+        for lot_id, total_spots, available_spots in lots
+        for i in range(1, total_spots + 1)
+    ]
+    db.session.execute(db.insert(ParkingSpot), spots)
+    seeded.update(lots=len(lots), spots=len(spots))
+    if not User.query.first():
+        db.session.add(User(
+            email='admin@parking.com',
+            password=hash_password('admin123'),
+            fullname='Admin User',
+            address='Admin Office',
+            phone='0000000000',
+            pincode='00000'
+        ))
+        seeded['admin'] = True
+    db.session.commit()
+    return seeded
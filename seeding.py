@@ -0,0 +1,165 @@
+import random
+from datetime import datetime, timedelta
+from models import db, User, ParkingLot, ParkingSpot, Booking
+from provisioning import spot_name
+from rollups import backfill_rollups
+from auth import hash_password
+
+INSERT_BATCH_SIZE = 5000
+SEEDED_PASSWORD = 'password'
+
+LOCATIONS = [
+    'Airport', 'Downtown', 'Mall', 'Railway Station', 'Stadium', 'Hospital', 'University', 'Tech Park',
+    'Old Town', 'Harbour', 'Convention Centre', 'Bus Terminal', 'Market', 'Riverside', 'Business District'
+]
+LOT_KINDS = ['Parking', 'Plaza', 'Garage', 'Deck', 'Lot', 'Multilevel', 'Basement', 'Open Yard']
+FIRST_NAMES = [
+    'Aarav', 'Diya', 'Ishaan', 'Kavya', 'Rohan', 'Ananya', 'Vikram', 'Meera', 'Arjun', 'Priya',
+    'Kabir', 'Sneha', 'Rahul', 'Nisha', 'Aditya', 'Pooja', 'Siddharth', 'Lakshmi', 'Karan', 'Divya'
+]
+LAST_NAMES = [
+    'Sharma', 'Iyer', 'Patel', 'Reddy', 'Nair', 'Gupta', 'Menon', 'Singh', 'Rao', 'Das',
+    'Kumar', 'Joshi', 'Pillai', 'Bose', 'Mehta', 'Verma', 'Chopra', 'Kapoor', 'Shah', 'Banerjee'
+]
+STATES = ['KA', 'TN', 'MH', 'DL', 'KL', 'TS', 'AP', 'GJ']
+HOUR_WEIGHTS = [1, 1, 1, 1, 1, 2, 4, 9, 14, 12, 9, 8, 8, 8, 7, 7, 8, 11, 12, 9, 6, 4, 3, 2]
+
+def insert_batches(model, rows):
+    batch = []
+    count = 0
+    for row in rows:
+        batch.append(row)
+        if len(batch) == INSERT_BATCH_SIZE:
+            db.session.execute(db.insert(model), batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        db.session.execute(db.insert(model), batch)
+        count += len(batch)
+    return count
+
+def vehicle_number(rng):
+    return f"{rng.choice(STATES)}{rng.randint(1, 99):02d}{rng.choice('ABCDEFGHJKLMNPRSTUVWXYZ')}{rng.choice('ABCDEFGHJKLMNPRSTUVWXYZ')}{rng.randint(1, 9999):04d}"
+
+def generate_users(rng, count, first_number, password_hash):
+    for number in range(first_number, first_number + count):
+        yield {
+            'email': f"user{number}@example.test",
+            'password': password_hash,
+            'fullname': f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            'address': f"{rng.randint(1, 999)} {rng.choice(LOCATIONS)} Road",
+            'phone': f"9{number:09d}",
+            'pincode': f"{rng.randint(110001, 855999)}"
+        }
+
+def generate_lots(rng, count, spots_per_lot, first_number):
+    for number in range(first_number, first_number + count):
+        location = rng.choice(LOCATIONS)
+        total_spots = max(1, int(rng.uniform(0.5, 1.5) * spots_per_lot))
+        yield {
+            'name': f"{location} {rng.choice(LOT_KINDS)} {number}",
+            'location': location,
+            'total_spots': total_spots,
+            'available_spots': total_spots,
+            'price_per_hour': float(rng.choice([20, 30, 40, 50, 60, 75, 80, 100, 120])),
+            'naming_scheme': 'rows',
+            'spots_per_row': 20
+        }
+
+def generate_spots(lots):
+    for lot_id, total_spots in lots:
+        for position in range(1, total_spots + 1):
+            yield {
+                'spot_number': spot_name(position, 'rows', 20),
+                'parking_lot_id': lot_id,
+                'is_occupied': False
+            }
+
+def popularity_weights(rng, count):
+    return [rng.paretovariate(1.2) for _ in range(count)]
+
+def generate_bookings(rng, count, user_ids, lots, lot_spots, days, now):
+    user_weights = popularity_weights(rng, len(user_ids))
+    lot_weights = popularity_weights(rng, len(lots))
+    users = rng.choices(user_ids, weights=user_weights, k=count)
+    chosen_lots = rng.choices(lots, weights=lot_weights, k=count)
+    hours = rng.choices(range(24), weights=HOUR_WEIGHTS, k=count)
+    for user_id, (lot_id, price_per_hour), hour in zip(users, chosen_lots, hours):
+        day = now.date() - timedelta(days=rng.randrange(days))
+        booking_time = datetime.combine(day, datetime.min.time()) + timedelta(hours=hour, seconds=rng.randrange(3600))
+        cancelled = rng.random() < 0.12
+        hours_parked = 1 if cancelled else max(1, min(72, int(rng.lognormvariate(0.8, 0.8))))
+        release_time = booking_time + timedelta(minutes=rng.randint(5, 55) if cancelled else hours_parked * 60 + rng.randint(0, 59))
+        if release_time >= now:
+            continue
+        yield {
+            'vehicle_number': vehicle_number(rng),
+            'booking_time': booking_time,
+            'release_time': release_time,
+            'status': 'cancelled' if cancelled else 'completed',
+            'total_cost': price_per_hour * hours_parked,
+            'user_id': user_id,
+            'parking_spot_id': rng.choice(lot_spots[lot_id]),
+            'parking_lot_id': lot_id
+        }
+
+def generate_active_bookings(rng, count, user_ids, lots, lot_spots, now):
+    count = min(count, len(user_ids), sum(len(spots) for spots in lot_spots.values()))
+    prices = dict(lots)
+    spots = rng.sample([(lot_id, spot_id) for lot_id, spot_ids in lot_spots.items() for spot_id in spot_ids], count)
+    for user_id, (lot_id, spot_id) in zip(rng.sample(user_ids, count), spots):
+        yield {
+            'vehicle_number': vehicle_number(rng),
+            'booking_time': now - timedelta(minutes=rng.randint(5, 600)),
+            'status': 'active',
+            'total_cost': prices[lot_id],
+            'user_id': user_id,
+            'parking_spot_id': spot_id,
+            'parking_lot_id': lot_id
+        }
+
+def generate_data(users=1000, lots=50, spots_per_lot=100, bookings=50000, active=0, days=180, seed=42):
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    next_user = (db.session.query(db.func.max(User.id)).scalar() or 0) + 1
+    next_lot = (db.session.query(db.func.max(ParkingLot.id)).scalar() or 0) + 1
+    insert_batches(User, generate_users(rng, users, next_user, hash_password(SEEDED_PASSWORD)))
+    insert_batches(ParkingLot, generate_lots(rng, lots, spots_per_lot, next_lot))
+    new_lots = db.session.execute(
+        db.select(ParkingLot.id, ParkingLot.total_spots, ParkingLot.price_per_hour).where(ParkingLot.id >= next_lot).order_by(ParkingLot.id)
+    ).all()
+    spot_count = insert_batches(ParkingSpot, generate_spots((lot_id, total_spots) for lot_id, total_spots, _ in new_lots))
+    lot_spots = {}
+    for spot_id, lot_id in db.session.execute(
+        db.select(ParkingSpot.id, ParkingSpot.parking_lot_id).where(ParkingSpot.parking_lot_id >= next_lot)
+    ):
+        lot_spots.setdefault(lot_id, []).append(spot_id)
+    user_ids = db.session.execute(db.select(User.id).where(User.id >= next_user)).scalars().all()
+    lot_prices = [(lot_id, price_per_hour) for lot_id, _, price_per_hour in new_lots]
+    booking_count = 0
+    active_count = 0
+    if user_ids and lot_prices:
+        booking_count = insert_batches(Booking, generate_bookings(rng, bookings, user_ids, lot_prices, lot_spots, days, now))
+        active_count = insert_batches(Booking, generate_active_bookings(rng, active, user_ids, lot_prices, lot_spots, now))
+    if active_count:
+        occupied = db.select(Booking.parking_spot_id).where(Booking.status == 'active', Booking.parking_lot_id >= next_lot)
+        db.session.execute(
+            db.update(ParkingSpot).where(ParkingSpot.id.in_(occupied)).values(is_occupied=True)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.execute(
+            db.update(ParkingLot).where(ParkingLot.id >= next_lot).values(
+                available_spots=ParkingLot.total_spots - db.select(db.func.count(ParkingSpot.id)).where(
+                    ParkingSpot.parking_lot_id == ParkingLot.id, ParkingSpot.is_occupied == True
+                ).scalar_subquery()
+            ).execution_options(synchronize_session=False)
+        )
+    db.session.commit()
+    backfill_rollups()
+    return {
+        'users': len(user_ids),
+        'lots': len(new_lots),
+        'spots': spot_count,
+        'bookings': booking_count,
+        'active_bookings': active_count
+    }
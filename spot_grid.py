@@ -0,0 +1,29 @@
+from flask import render_template
+from markupsafe import Markup
+from cache import TTLCache
+from occupancy import occupancy_index
+
+SPOT_GRID_CACHE_BYTES = 32 * 1024 * 1024
+
+spot_grid_fragments = TTLCache(
+    maxsize=5000, ttl=3600, max_weight=SPOT_GRID_CACHE_BYTES, weigh=lambda entry: len(entry[1])
+)
+
+def spot_grid_html(lot_id):
+    cached = spot_grid_fragments.get(lot_id)
+    if cached and cached[0] == occupancy_index.version(lot_id):
+        return cached[1]
+    version, spots = occupancy_index.spot_grid(lot_id)
+    html = Markup(render_template('spot_grid.html', spots=spots))
+    spot_grid_fragments.set(lot_id, (version, html))
+    return html
+
+def inline_grid_lots(lots, max_spots):
+    inline = set()
+    spots = 0
+    for lot in lots:
+        spots += lot['total_spots']
+        if spots > max_spots:
+            break
+        inline.add(lot['id'])
+    return inline
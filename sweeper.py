@@ -0,0 +1,111 @@
+from datetime import datetime, timedelta
+from flask import current_app
+from models import db, Booking, ParkingLot, ParkingSpot
+from allocation import AllocationError, release_bookings
+from lot_cache import forget_lot_availability
+from occupancy import stage_occupancy
+from reservations import expire_reservations
+from jobs import run_periodically
+
+CLOSE_CHUNK_SIZE = 200
+
+def spot_count(*conditions):
+    return db.select(db.func.count(ParkingSpot.id)).where(
+        ParkingSpot.parking_lot_id == ParkingLot.id, *conditions
+    ).scalar_subquery()
+
+def mark_booked_spots_occupied():
+    booked = db.select(Booking.parking_spot_id).where(Booking.status == 'active')
+    spot_ids = db.session.execute(
+        db.select(ParkingSpot.id).where(ParkingSpot.is_occupied == False, ParkingSpot.id.in_(booked))
+    ).scalars().all()
+    if spot_ids:
+        db.session.execute(
+            db.update(ParkingSpot).where(ParkingSpot.is_occupied == False, ParkingSpot.id.in_(booked))
+            .values(is_occupied=True).execution_options(synchronize_session=False)
+        )
+    return spot_ids
+
+def reconcile_counters():
+    free = spot_count(ParkingSpot.is_occupied == False)
+    total = spot_count()
+    drifted = db.or_(ParkingLot.available_spots != free, ParkingLot.total_spots != total)
+    drift = [
+        {'lot_id': lot_id, 'available_spots': (available, actual_free), 'total_spots': (total_spots, actual_total)}
+        for lot_id, available, actual_free, total_spots, actual_total in db.session.execute(
+            db.select(ParkingLot.id, ParkingLot.available_spots, free, ParkingLot.total_spots, total).where(drifted)
+        )
+    ]
+    if drift:
+        db.session.execute(
+            db.update(ParkingLot).where(drifted).values(available_spots=free, total_spots=total)
+            .execution_options(synchronize_session=False)
+        )
+    return drift
+
+def stale_booking_ids(max_active_hours, now=None):
+    cutoff = (now or datetime.utcnow()) - timedelta(hours=max_active_hours)
+    return db.session.execute(
+        db.select(Booking.id).where(Booking.status == 'active', Booking.booking_time < cutoff).order_by(Booking.id)
+    ).scalars().all()
+
+def close_stale_bookings(booking_ids):
+    closed = 0
+    failed = []
+    for i in range(0, len(booking_ids), CLOSE_CHUNK_SIZE):
+        chunk = booking_ids[i:i + CLOSE_CHUNK_SIZE]
+        try:
+            closed += len(release_bookings(chunk))
+        except AllocationError as e:
+            db.session.rollback()
+            current_app.logger.error(f"Sweeper could not close bookings {chunk[0]}..{chunk[-1]}: {e}")
+            failed.append({'booking_ids': chunk, 'error': str(e), 'errors': e.errors})
+    return closed, failed
+
+def sweep(max_active_hours=24, close_stale=False):
+    occupied_spot_ids = mark_booked_spots_occupied()
+    if occupied_spot_ids:
+        stage_occupancy('rebuild')
+    db.session.commit()
+    stale_ids = stale_booking_ids(max_active_hours)
+    closed, failed = close_stale_bookings(stale_ids) if close_stale and stale_ids else (0, [])
+    expired = expire_reservations()
+    drift = reconcile_counters()
+    if drift:
+        forget_lot_availability()
+    db.session.commit()
+    return {
+        'spots_marked_occupied': occupied_spot_ids,
+        'counter_drift': drift,
+        'stale_bookings': stale_ids,
+        'closed_bookings': closed,
+        'failed_closes': failed,
+        'expired_reservations': expired
+    }
+
+def describe_sweep(report):
+    lines = []
+    if report['spots_marked_occupied']:
+        lines.append(f"Marked {len(report['spots_marked_occupied'])} spot(s) with an active booking as occupied: "
+                     f"{', '.join(str(spot_id) for spot_id in report['spots_marked_occupied'])}")
+    for drift in report['counter_drift']:
+        (available, free), (total_spots, total) = drift['available_spots'], drift['total_spots']
+        lines.append(f"Lot {drift['lot_id']}: available_spots {available} -> {free}, total_spots {total_spots} -> {total}")
+    if report['stale_bookings']:
+        action = f"closed {report['closed_bookings']}" if report['closed_bookings'] or report['failed_closes'] else 'flagged'
+        lines.append(f"{len(report['stale_bookings'])} stale active booking(s) {action}: "
+                     f"{', '.join(str(booking_id) for booking_id in report['stale_bookings'][:50])}"
+                     f"{' ...' if len(report['stale_bookings']) > 50 else ''}")
+    for failure in report['failed_closes']:
+        booking_ids = failure['booking_ids']
+        lines.append(f"Could not close {len(booking_ids)} stale booking(s) {booking_ids[0]}..{booking_ids[-1]}: {failure['error']}")
+    if report['expired_reservations']:
+        lines.append(f"Cancelled {report['expired_reservations']} reservation(s) that ended without a check-in")
+    return lines
+
+def start_sweeper(app, interval):
+    def job():
+        report = sweep(app.config['STALE_BOOKING_HOURS'], app.config['CLOSE_STALE_BOOKINGS'])
+        for line in describe_sweep(report):
+            app.logger.warning(f"Sweeper: {line}")
+    return run_periodically(app, interval, 'parking-sweeper', job)
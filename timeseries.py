@@ -0,0 +1,159 @@
+from datetime import datetime, timedelta
+from cache import TTLCache
+from jobs import run_periodically
+from models import db, OccupancySnapshot, ParkingSpot
+
+RAW_RETENTION = timedelta(days=2)
+HOURLY_RETENTION = timedelta(days=90)
+SERIES_RESOLUTIONS = ('hour', 'day', 'week')
+
+occupancy_series = TTLCache(maxsize=256, ttl=60)
+
+def take_snapshot(now=None):
+    taken_at = (now or datetime.utcnow()).replace(second=0, microsecond=0)
+    exists = db.session.execute(
+        db.select(OccupancySnapshot.parking_lot_id)
+        .where(OccupancySnapshot.resolution == 'raw', OccupancySnapshot.taken_at == taken_at).limit(1)
+    ).first()
+    if exists:
+        return 0
+    occupied = db.func.coalesce(db.func.sum(db.case((ParkingSpot.is_occupied == True, 1), else_=0)), 0)
+    inserted = db.session.execute(db.insert(OccupancySnapshot).from_select(
+        ['parking_lot_id', 'resolution', 'taken_at', 'occupied_avg', 'occupied_max', 'total_spots', 'samples'],
+        db.select(
+            ParkingSpot.parking_lot_id, db.literal('raw'), db.literal(taken_at, db.DateTime),
+            db.cast(occupied, db.Float), occupied, db.func.count(ParkingSpot.id), db.literal(1)
+        ).group_by(ParkingSpot.parking_lot_id)
+    )).rowcount
+    db.session.commit()
+    return inserted
+
+def truncate(moment, resolution):
+    if resolution == 'hour':
+        return moment.replace(minute=0, second=0, microsecond=0)
+    day = datetime.combine(moment.date(), datetime.min.time())
+    if resolution == 'week':
+        return day - timedelta(days=moment.weekday())
+    return day
+
+def bucket_column(dialect, resolution):
+    if dialect == 'sqlite':
+        pattern = '%Y-%m-%d %H:00:00.000000' if resolution == 'hour' else '%Y-%m-%d 00:00:00.000000'
+        return db.func.strftime(pattern, OccupancySnapshot.taken_at)
+    if dialect == 'postgresql':
+        return db.func.date_trunc(resolution, OccupancySnapshot.taken_at)
+    return None
+
+def merge_rows(rows):
+    merged = {}
+    for lot_id, bucket, occupied_avg, occupied_max, total_spots, samples in rows:
+        key = (lot_id, bucket)
+        if key not in merged:
+            merged[key] = [0.0, 0, 0, 0]
+        point = merged[key]
+        point[0] += occupied_avg * samples
+        point[1] = max(point[1], occupied_max)
+        point[2] = max(point[2], total_spots)
+        point[3] += samples
+    return merged
+
+def roll_up(source, target, cutoff):
+    stale = (OccupancySnapshot.resolution == source, OccupancySnapshot.taken_at < cutoff)
+    bucket = bucket_column(db.session.get_bind().dialect.name, target)
+    if bucket is not None:
+        samples = db.func.sum(OccupancySnapshot.samples)
+        db.session.execute(db.insert(OccupancySnapshot).from_select(
+            ['parking_lot_id', 'resolution', 'taken_at', 'occupied_avg', 'occupied_max', 'total_spots', 'samples'],
+            db.select(
+                OccupancySnapshot.parking_lot_id, db.literal(target), bucket,
+                db.func.sum(OccupancySnapshot.occupied_avg * OccupancySnapshot.samples) / samples,
+                db.func.max(OccupancySnapshot.occupied_max), db.func.max(OccupancySnapshot.total_spots), samples
+            ).where(*stale).group_by(OccupancySnapshot.parking_lot_id, bucket)
+        ))
+    else:
+        rows = db.session.execute(db.select(
+            OccupancySnapshot.parking_lot_id, OccupancySnapshot.taken_at, OccupancySnapshot.occupied_avg,
+            OccupancySnapshot.occupied_max, OccupancySnapshot.total_spots, OccupancySnapshot.samples
+        ).where(*stale))
+        merged = merge_rows(
+            (lot_id, truncate(taken_at, target), occupied_avg, occupied_max, total_spots, samples)
+            for lot_id, taken_at, occupied_avg, occupied_max, total_spots, samples in rows
+        )
+        if merged:
+            db.session.execute(db.insert(OccupancySnapshot), [
+                {'parking_lot_id': lot_id, 'resolution': target, 'taken_at': bucket_start,
+                 'occupied_avg': weighted / samples, 'occupied_max': occupied_max,
+                 'total_spots': total_spots, 'samples': samples}
+                for (lot_id, bucket_start), (weighted, occupied_max, total_spots, samples) in merged.items()
+            ])
+    return db.session.execute(db.delete(OccupancySnapshot).where(*stale).execution_options(synchronize_session=False)).rowcount
+
+def downsample(now=None):
+    now = now or datetime.utcnow()
+    raw_rows = roll_up('raw', 'hour', truncate(now - RAW_RETENTION, 'hour'))
+    hourly_rows = roll_up('hour', 'day', truncate(now - HOURLY_RETENTION, 'day'))
+    db.session.commit()
+    occupancy_series.clear()
+    return {'raw_rows_rolled_up': raw_rows, 'hourly_rows_rolled_up': hourly_rows}
+
+def snapshot_rows(lot_id, since):
+    query = db.select(
+        OccupancySnapshot.parking_lot_id, OccupancySnapshot.taken_at, OccupancySnapshot.occupied_avg,
+        OccupancySnapshot.occupied_max, OccupancySnapshot.total_spots, OccupancySnapshot.samples
+    ).where(OccupancySnapshot.taken_at >= since)
+    if lot_id is not None:
+        query = query.where(OccupancySnapshot.parking_lot_id == lot_id)
+    return db.session.execute(query)
+
+def load_series(lot_id, resolution, days):
+    since = truncate(datetime.utcnow() - timedelta(days=days), resolution)
+    merged = merge_rows(
+        (row_lot_id, truncate(taken_at, resolution), occupied_avg, occupied_max, total_spots, samples)
+        for row_lot_id, taken_at, occupied_avg, occupied_max, total_spots, samples in snapshot_rows(lot_id, since)
+    )
+    buckets = {}
+    for (_, bucket_start), (weighted, occupied_max, total_spots, samples) in merged.items():
+        point = buckets.setdefault(bucket_start, [0.0, 0, 0])
+        point[0] += weighted / samples
+        point[1] += occupied_max
+        point[2] += total_spots
+    return [
+        {
+            'time': bucket_start.isoformat(),
+            'occupied_avg': round(occupied_avg, 2),
+            'occupied_max': occupied_max,
+            'total_spots': total_spots,
+            'occupancy_rate': round(occupied_avg / total_spots, 4) if total_spots else 0.0
+        }
+        for bucket_start, (occupied_avg, occupied_max, total_spots) in sorted(buckets.items())
+    ]
+
+def lot_series(lot_id=None, resolution='hour', days=7):
+    return occupancy_series.get_or_load(('series', lot_id, resolution, days), lambda: load_series(lot_id, resolution, days))
+
+def load_peak_hours(lot_id, days):
+    since = datetime.utcnow() - timedelta(days=days)
+    query = db.select(
+        OccupancySnapshot.taken_at, OccupancySnapshot.occupied_avg,
+        OccupancySnapshot.total_spots, OccupancySnapshot.samples
+    ).where(OccupancySnapshot.resolution.in_(['raw', 'hour']), OccupancySnapshot.taken_at >= since)
+    if lot_id is not None:
+        query = query.where(OccupancySnapshot.parking_lot_id == lot_id)
+    occupied = [0.0] * 24
+    capacity = [0.0] * 24
+    for taken_at, occupied_avg, total_spots, samples in db.session.execute(query):
+        occupied[taken_at.hour] += occupied_avg * samples
+        capacity[taken_at.hour] += total_spots * samples
+    return [
+        {'hour': hour, 'occupancy_rate': round(occupied[hour] / capacity[hour], 4) if capacity[hour] else None}
+        for hour in range(24)
+    ]
+
+def peak_hours(lot_id=None, days=30):
+    return occupancy_series.get_or_load(('peak', lot_id, days), lambda: load_peak_hours(lot_id, days))
+
+def start_snapshots(app, interval):
+    def job():
+        take_snapshot()
+        downsample()
+    return run_periodically(app, interval, 'occupancy-snapshots', job)
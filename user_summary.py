@@ -0,0 +1,88 @@
+from datetime import datetime
+from cache import TTLCache, invalidate_after_commit
+from models import db, Booking, ParkingLot, ParkingSpot, User
+from rollups import user_booking_stats
+
+HISTORY_LIMIT = 5
+UPCOMING_LIMIT = 5
+
+user_summaries = TTLCache(maxsize=10000, ttl=300)
+
+def booking_rows(*conditions):
+    return db.select(
+        Booking.id, Booking.status, Booking.vehicle_number, Booking.booking_time, Booking.total_cost,
+        ParkingSpot.spot_number, ParkingLot.name
+    ).join(
+        ParkingSpot, Booking.parking_spot_id == ParkingSpot.id
+    ).join(
+        ParkingLot, ParkingSpot.parking_lot_id == ParkingLot.id
+    ).where(*conditions)
+
+def upcoming_reservations(user_id):
+    rows = db.session.execute(
+        booking_rows(Booking.user_id == user_id, Booking.status == 'reserved', Booking.reserved_until > datetime.utcnow())
+        .add_columns(Booking.reserved_until)
+        .order_by(Booking.booking_time)
+        .limit(UPCOMING_LIMIT)
+    ).all()
+    return [
+        {
+            'id': f"{booking_id:03d}",
+            'location': lot_name,
+            'spot': spot_number,
+            'vehicle_number': vehicle_number,
+            'start': booking_time.strftime('%Y-%m-%d %H:%M'),
+            'end': reserved_until.strftime('%Y-%m-%d %H:%M')
+        }
+        for booking_id, _, vehicle_number, booking_time, _, spot_number, lot_name, reserved_until in rows
+    ]
+
+def load_user_summary(user_id, version):
+    rows = db.session.execute(
+        booking_rows(Booking.user_id == user_id, Booking.status.in_(['active', 'completed', 'cancelled']))
+        .order_by(db.case((Booking.status == 'active', 0), else_=1), Booking.booking_time.desc())
+        .limit(HISTORY_LIMIT + 1)
+    ).all()
+    current_booking = None
+    booking_history = []
+    for booking_id, status, vehicle_number, booking_time, total_cost, spot_number, lot_name in rows:
+        if status == 'active':
+            current_booking = {
+                'spot_id': spot_number,
+                'lot_id': lot_name,
+                'vehicle_number': vehicle_number,
+                'booking_time': booking_time.strftime('%Y-%m-%d %H:%M'),
+                'cost': total_cost
+            }
+        elif len(booking_history) < HISTORY_LIMIT:
+            booking_history.append({
+                'id': f"{booking_id:03d}",
+                'location': lot_name,
+                'date': booking_time.strftime('%Y-%m-%d'),
+                'status': status
+            })
+    return {
+        'stats': user_booking_stats(user_id),
+        'current_booking': current_booking,
+        'booking_history': booking_history,
+        'upcoming_reservations': upcoming_reservations(user_id),
+        'version': version
+    }
+
+def summary_version(user_id):
+    return db.session.execute(db.select(User.summary_version).where(User.id == user_id)).scalar()
+
+def user_summary(user_id):
+    version = summary_version(user_id)
+    summary = user_summaries.get(user_id)
+    if summary is None or summary['version'] != version:
+        summary = load_user_summary(user_id, version)
+        user_summaries.set(user_id, summary)
+    return summary
+
+def forget_user_summary(user_id):
+    db.session.execute(
+        db.update(User).where(User.id == user_id).values(summary_version=User.summary_version + 1)
+        .execution_options(synchronize_session=False)
+    )
+    invalidate_after_commit(user_summaries, user_id)
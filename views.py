@@ -0,0 +1,668 @@
+from flask import current_app, render_template, request, redirect, url_for, flash, session, jsonify, Response, stream_with_context
+from datetime import datetime
+from models import db, User, ParkingLot, ParkingSpot, Booking
+from forms import (
+    AdminSearchForm, BookingForm, ChangeSpotStatusForm, EditParkingLotForm, EditSpotNameForm, LoginForm,
+    LotSelectionForm, ParkingLotForm, ReleaseParkingForm, ReleaseSpotForm, ReportFilterForm, SearchForm, SignUpForm
+)
+from allocation import AllocationError, book_spot, claim_spot, free_spot, release_booking
+from occupancy import occupancy_index, stage_occupancy
+from events import event_hub
+from rollups import record_closed_booking
+from user_summary import user_summaries, user_summary, forget_user_summary
+from exports import EXPORT_FORMATS, export_chunks
+from reports import booking_filters, booking_page, booking_totals, user_page, user_totals
+from lot_search import search_lot_ids, stage_lot_search
+from lot_cache import build_lot_choices, cached_lot_choices, cached_lot_listing, forget_lot_metadata, lot_cache_stats
+from auth import authenticate, hash_password, is_admin_user
+from archival import delete_lot
+from timeseries import occupancy_series
+from spot_grid import inline_grid_lots, spot_grid_fragments, spot_grid_html
+from provisioning import NAMING_SCHEMES, provision_spots, free_spots_for_removal, remove_spots
+from reservations import bookable_spots
+
+routes = []
+
+def route(rule, **options):
+    def register(view):
+        routes.append((rule, view, options))
+        return view
+    return register
+
+def register_views(app):
+    for rule, view, options in routes:
+        app.add_url_rule(rule, view_func=view, **options)
+
+def lot_occupancy_counts(lot_ids):
+    rows = db.session.query(
+        ParkingSpot.parking_lot_id,
+        db.func.count(ParkingSpot.id)
+    ).filter(
+        ParkingSpot.parking_lot_id.in_(lot_ids),
+        ParkingSpot.is_occupied == True
+    ).group_by(ParkingSpot.parking_lot_id).all()
+    return {lot_id: occupied for lot_id, occupied in rows}
+
+def lots_in_order(lot_ids, lots_query=None):
+    if lots_query is None:
+        lots_query = ParkingLot.query.filter(ParkingLot.id.in_(lot_ids))
+    lots = {lot.id: lot for lot in lots_query}
+    return [lots[lot_id] for lot_id in lot_ids if lot_id in lots]
+
+def naming_options(form):
+    return {
+        'naming_scheme': form.naming_scheme.data,
+        'spots_per_row': form.spots_per_row.data,
+        'rows_per_level': form.rows_per_level.data
+    }
+
+@route('/',methods=['GET','POST'])
+def home():
+    form = LoginForm()
+    if request.method == 'POST':
+        if form.validate_on_submit():
+            email = form.email.data
+            password = form.password.data
+            user_id = authenticate(email, password)
+            if user_id:
+                session['email'] = email
+                session['user_id'] = user_id
+                if is_admin_user(user_id):
+                    session['is_admin'] = True
+                    return redirect(url_for('admin_dashboard'))
+                else:
+                    session['is_admin'] = False
+                    return redirect(url_for('user_dashboard'))
+            else:
+                flash('Invalid credentials, please try again.', 'error')
+                return redirect(url_for('home'))
+    return render_template('Login.html', form=form)
+
+@route('/logout')
+def logout():
+    session.clear()
+    flash('You have been logged out successfully.', 'info')
+    return redirect(url_for('home'))
+
+@route('/signup', methods=['GET', 'POST'])
+def signup():
+    form = SignUpForm()
+    if request.method == 'POST':
+        if form.validate_on_submit():
+            email = form.email.data
+            password = form.password.data
+            address = form.address.data
+            fullname = form.fullname.data
+            pincode = form.pincode.data
+            phone = form.phone.data
+            existing_user = User.query.filter_by(email=email).first()
+            if existing_user:
+                flash('Email already registered. Please use a different email.', 'error')
+                return render_template('SignUp.html', form=form)
+            new_user = User(
+                email=email,
+                password=hash_password(password),
+                fullname=fullname,
+                address=address,
+                pincode=pincode,
+                phone=phone
+            )
+            db.session.add(new_user)
+            db.session.commit()
+            flash('Signup successful! You can now log in.', 'success')
+            return redirect(url_for('home'))
+        else:
+            flash('Please fill out all fields correctly.', 'error')
+    return render_template('SignUp.html',form=form)
+
+@route('/user-dashboard', methods=['GET', 'POST'])
+def user_dashboard():
+    if 'email' not in session:
+        flash('You need to log in first.', 'error')
+        return redirect(url_for('home'))
+    email = session['email']
+    user = User.query.filter_by(email=email).first()
+    lot_selection_form = LotSelectionForm()
+    booking_form = BookingForm()
+    search_form = SearchForm()
+    release_form = ReleaseParkingForm()
+    booking_form.spot_id.choices = [('', 'Select a lot first')]
+    selected_lot = None
+    available_spots = []
+    search_location = request.args.get('location', '')
+    if search_location:
+        search_form.location.data = search_location
+        parking_lots = cached_lot_listing(search_lot_ids(search_location))
+        lot_selection_form.lot_id.choices = build_lot_choices(parking_lots)
+    else:
+        parking_lots = cached_lot_listing()
+        lot_selection_form.lot_id.choices = cached_lot_choices()
+    if request.method == 'POST' and lot_selection_form.submit.data and lot_selection_form.validate():
+        selected_lot_id = int(lot_selection_form.lot_id.data)
+        selected_lot = ParkingLot.query.get(selected_lot_id)
+        if selected_lot:
+            available_spots = bookable_spots(selected_lot_id)
+            booking_form.lot_id.data = selected_lot_id
+            booking_form.spot_id.choices = [('', 'Select a spot')] + [
+                (str(spot.id), f"Spot {spot.spot_number}")
+                for spot in available_spots
+            ]
+            lot_selection_form.lot_id.data = str(selected_lot_id)
+            if not available_spots:
+                flash('No available spots in this parking lot.', 'warning')
+    if request.method == 'POST' and booking_form.submit.data and booking_form.validate():
+        existing_booking = Booking.query.filter_by(user_id=user.id, status='active').first()
+        if existing_booking:
+            flash('You already have an active booking. Please release it first.', 'error')
+        else:
+            spot_id = int(booking_form.spot_id.data)
+            lot_id = booking_form.lot_id.data
+            vehicle_number = booking_form.vehicle_number.data
+            try:
+                new_booking = book_spot(user.id, lot_id, vehicle_number, spot_id=spot_id)
+                flash(f'Parking booked successfully! Spot: {new_booking.parking_spot.spot_number} at {new_booking.parking_spot.parking_lot.name}', 'success')
+                return redirect(url_for('user_dashboard'))
+            except AllocationError as e:
+                flash(str(e), 'error')
+    summary = user_summary(user.id)
+    current_booking = summary['current_booking']
+    booking_history = summary['booking_history']
+    user_stats = summary['stats']
+    if current_booking:
+        release_form.spot_display.data = current_booking['spot_id']
+        release_form.vehicle_display.data = current_booking['vehicle_number']
+        release_form.cost_display.data = f"₹{current_booking['cost']}"
+    return render_template('user_dashboard.html', 
+                         email=email,
+                         parking_lots=parking_lots, 
+                         search_location=search_location,
+                         current_booking=current_booking, 
+                         booking_history=booking_history,
+                         upcoming_reservations=summary['upcoming_reservations'],
+                         lot_selection_form=lot_selection_form,
+                         booking_form=booking_form,
+                         search_form=search_form, 
+                         release_form=release_form,
+                         selected_lot=selected_lot,
+                         available_spots=available_spots,
+                         user_stats=user_stats)
+
+@route('/user-charts', methods=['GET'])
+def user_charts():
+    if 'email' not in session:
+        flash('You need to log in first.', 'error')
+        return redirect(url_for('home'))
+    email = session['email']
+    user = User.query.filter_by(email=email).first()
+    if not user:
+        flash('User not found.', 'error')
+        return redirect(url_for('home'))
+    summary = user_summary(user.id)
+    user_stats = summary['stats']
+    current_booking = summary['current_booking']
+    return render_template('user_charts.html',
+                         email=email,
+                         user_stats=user_stats,
+                         current_booking=current_booking)
+
+@route('/release-parking', methods=['POST'])
+def release_parking():
+    if 'email' not in session:
+        flash('You need to log in first.', 'error')
+        return redirect(url_for('home'))
+    email = session['email']
+    user = User.query.filter_by(email=email).first()
+    if not user:
+        flash('User not found.', 'error')
+        return redirect(url_for('user_dashboard'))    
+    release_form = ReleaseParkingForm()
+    if not release_form.validate_on_submit():
+        flash('Invalid form submission.', 'error')
+        return redirect(url_for('user_dashboard'))
+    
+    active_booking = Booking.query.filter_by(user_id=user.id, status='active').first()
+    if not active_booking:
+        flash('You do not have any active booking to release.', 'error')
+        return redirect(url_for('user_dashboard'))
+    
+    try:
+        parking_spot = active_booking.parking_spot
+        active_booking, hours_parked = release_booking(active_booking.id)
+        flash(f'Parking spot {parking_spot.spot_number} released successfully! Duration: {hours_parked} hour(s), Cost: ₹{active_booking.total_cost}', 'success')
+    except Exception as e:
+        db.session.rollback()
+        flash('An error occurred while releasing the parking spot. Please try again.', 'error')
+        print(f"Release error: {e}")
+    return redirect(url_for('user_dashboard'))
+
+@route('/admin-dashboard', methods=['GET'])
+def admin_dashboard():
+    if 'email' not in session or not session.get('is_admin', False):
+        flash('Admin access required.', 'error')
+        return redirect(url_for('home'))
+    email = session['email']
+    form = ParkingLotForm()
+    search_form = AdminSearchForm()
+    search_query = request.args.get('search', '')
+    if search_query:
+        search_form.search.data = search_query
+    lots_query = ParkingLot.query
+    if search_query:
+        matching_ids = search_lot_ids(search_query)
+        lots_query = lots_query.filter(ParkingLot.id.in_(matching_ids))
+        parking_lots = lots_in_order(matching_ids, lots_query)
+    else:
+        parking_lots = lots_query.all()
+    lot_ids = lots_query.with_entities(ParkingLot.id).scalar_subquery()
+    occupancy = lot_occupancy_counts(lot_ids)
+    parking_lots_data = []
+    for lot in parking_lots:
+        occupied_spots = occupancy.get(lot.id, 0)
+        parking_lots_data.append({
+            'id': lot.id,
+            'name': lot.name,
+            'location': lot.location,
+            'total_spots': lot.total_spots,
+            'occupied_spots': occupied_spots,
+            'available_spots': lot.total_spots - occupied_spots,
+            'price_per_hour': lot.price_per_hour
+        })
+    inline_lots = inline_grid_lots(parking_lots_data, current_app.config['DASHBOARD_INLINE_SPOTS'])
+    for lot in parking_lots_data:
+        lot['grid'] = spot_grid_html(lot['id']) if lot['id'] in inline_lots else None
+    admin_data = {
+        'parking_lots': parking_lots_data,
+        'search_query': search_query
+    }
+    return render_template('admin_dashboard.html', email=email, admin_data=admin_data, form=form, search_form=search_form)
+
+@route('/admin/lots/<int:lot_id>/spot-grid')
+def admin_spot_grid(lot_id):
+    if 'email' not in session or not session.get('is_admin', False):
+        flash('Admin access required.', 'error')
+        return redirect(url_for('home'))
+    if occupancy_index.version(lot_id) is None:
+        return Response('Parking lot not found.', status=404, mimetype='text/plain')
+    return spot_grid_html(lot_id)
+
+@route('/add-parking-lot', methods=['POST'])
+def add_parking_lot():
+    if 'email' not in session or not session.get('is_admin', False):
+        flash('Admin access required.', 'error')
+        return redirect(url_for('home'))
+    form = ParkingLotForm()
+    if form.validate_on_submit():
+        name = form.name.data
+        location = form.location.data
+        total_spots = form.total_spots.data
+        price_per_hour = form.price_per_hour.data
+        new_lot = ParkingLot(
+            name=name,
+            location=location,
+            total_spots=total_spots,
+            available_spots=total_spots,
+            price_per_hour=price_per_hour,
+            **naming_options(form)
+        )
+        db.session.add(new_lot)
+        db.session.flush()
+        provision_spots(new_lot, total_spots)
+        stage_lot_search(new_lot.id, name, location)
+        forget_lot_metadata()
+        stage_occupancy('reload_lot', new_lot.id)
+        db.session.commit()
+        flash(f'Parking lot "{name}" added successfully with {total_spots} spots!', 'success')
+    else:
+        flash('Please fill all fields correctly.', 'error')
+    return redirect(url_for('admin_dashboard'))
+
+@route('/delete-parking-lot/<int:lot_id>', methods=['POST'])
+def delete_parking_lot(lot_id):
+    if 'email' not in session or not session.get('is_admin', False):
+        flash('Admin access required.', 'error')
+        return redirect(url_for('home'))
+    lot = ParkingLot.query.get_or_404(lot_id)
+    lot_name = lot.name
+    try:
+        deleted = delete_lot(lot_id, current_app.config['DELETE_CHUNK_SIZE'])
+    except AllocationError as e:
+        flash(f'Cannot delete lot "{lot_name}". {e}', 'error')
+        return redirect(url_for('admin_dashboard'))
+    if deleted['reservations']:
+        flash(f'{deleted["reservations"]} open reservations in "{lot_name}" were cancelled.', 'warning')
+    flash(f'Parking lot "{lot_name}" deleted successfully!', 'success')
+    return redirect(url_for('admin_dashboard'))
+
+@route('/release-spot/<int:spot_id>', methods=['POST'])
+def release_spot(spot_id):
+    if 'email' not in session or not session.get('is_admin', False):
+        flash('Admin access required.', 'error')
+        return redirect(url_for('home'))
+    spot = ParkingSpot.query.get_or_404(spot_id)
+    if not spot.is_occupied:
+        flash(f'Spot {spot.spot_number} is not currently occupied.', 'warning')
+        return redirect(url_for('admin_dashboard'))
+    active_booking = Booking.query.filter_by(parking_spot_id=spot_id, status='active').first()
+    if active_booking:
+        active_booking.status = 'cancelled'
+        active_booking.release_time = datetime.utcnow()
+        record_closed_booking(active_booking)
+        forget_user_summary(active_booking.user_id)
+    free_spot(spot.id)
+    db.session.commit()
+    flash(f'Spot {spot.spot_number} has been released successfully!', 'success')
+    return redirect(url_for('admin_dashboard'))
+
+@route('/edit-parking-lot/<int:lot_id>', methods=['GET', 'POST'])
+def edit_parking_lot(lot_id):
+    if 'email' not in session or not session.get('is_admin', False):
+        flash('Admin access required.', 'error')
+        return redirect(url_for('home'))
+    lot = ParkingLot.query.get_or_404(lot_id)
+    form = EditParkingLotForm(obj=lot)
+    if request.method == 'POST' and form.validate_on_submit():
+        old_total_spots = lot.total_spots
+        new_total_spots = form.total_spots.data
+        lot.name = form.name.data
+        lot.location = form.location.data
+        lot.price_per_hour = form.price_per_hour.data
+        if new_total_spots != old_total_spots:
+            current_spots_count = ParkingSpot.query.filter_by(parking_lot_id=lot_id).count()
+            if new_total_spots > current_spots_count:
+                spots_to_add = new_total_spots - current_spots_count
+                provision_spots(lot, spots_to_add)
+                db.session.execute(
+                    db.update(ParkingLot).where(ParkingLot.id == lot_id)
+                    .values(available_spots=ParkingLot.available_spots + spots_to_add)
+                    .execution_options(synchronize_session=False)
+                )
+                flash(f'Added {spots_to_add} new parking spots!', 'success')
+            elif new_total_spots < current_spots_count:
+                spots_to_remove = current_spots_count - new_total_spots
+                removable_spot_ids = free_spots_for_removal(lot_id, spots_to_remove)
+                if len(removable_spot_ids) < spots_to_remove:
+                    flash(f'Cannot reduce spots to {new_total_spots}. Only {len(removable_spot_ids)} spots are available for removal (others are occupied).', 'error')
+                    return render_template('edit_parking_lot.html', lot=lot, form=form, naming_schemes=dict(NAMING_SCHEMES), email=session['email'])                
+                removed = remove_spots(removable_spot_ids)
+                if removed < spots_to_remove:
+                    db.session.rollback()
+                    flash(f'Cannot reduce spots to {new_total_spots}. Some of the selected spots were booked meanwhile, please try again.', 'error')
+                    return redirect(url_for('edit_parking_lot', lot_id=lot_id))
+                db.session.execute(
+                    db.update(ParkingLot).where(ParkingLot.id == lot_id)
+                    .values(available_spots=ParkingLot.available_spots - removed)
+                    .execution_options(synchronize_session=False)
+                )
+                flash(f'Removed {removed} parking spots!', 'warning')
+        lot.total_spots = new_total_spots
+        stage_occupancy('reload_lot', lot_id)
+        stage_lot_search(lot_id, lot.name, lot.location)
+        forget_lot_metadata()
+        db.session.commit() 
+        flash(f'Parking lot "{lot.name}" updated successfully!', 'success')
+        return redirect(url_for('admin_dashboard'))
+    return render_template('edit_parking_lot.html', lot=lot, form=form, naming_schemes=dict(NAMING_SCHEMES), email=session['email'])
+
+@route('/view-parking-spot/<int:spot_id>')
+def view_parking_spot(spot_id):
+    if 'email' not in session or not session.get('is_admin', False):
+        flash('Admin access required.', 'error')
+        return redirect(url_for('home'))
+    spot = ParkingSpot.query.get_or_404(spot_id)
+    release_spot_form = ReleaseSpotForm()
+    edit_spot_form = EditSpotNameForm()
+    status_form = ChangeSpotStatusForm()
+    edit_spot_form.spot_number.data = spot.spot_number
+    status_form.is_occupied.data = spot.is_occupied
+    booking_history = Booking.query.filter_by(parking_spot_id=spot_id).order_by(
+        Booking.booking_time.desc()
+    ).limit(10).all()
+    current_booking = None
+    if spot.is_occupied:
+        current_booking = Booking.query.filter_by(
+            parking_spot_id=spot_id, 
+            status='active'
+        ).first()
+    spot_data = {
+        'id': spot.id,
+        'spot_number': spot.spot_number,
+        'is_occupied': spot.is_occupied,
+        'lot_name': spot.parking_lot.name,
+        'lot_location': spot.parking_lot.location,
+        'price_per_hour': spot.parking_lot.price_per_hour,
+        'current_booking': current_booking,
+        'booking_history': booking_history
+    }
+    return render_template('view_parking_spot.html', spot=spot_data, email=session['email'],
+                         release_spot_form=release_spot_form,
+                         edit_spot_form=edit_spot_form, status_form=status_form)
+
+@route('/edit-spot-name/<int:spot_id>', methods=['POST'])
+def edit_spot_name(spot_id):
+    if 'email' not in session or not session.get('is_admin', False):
+        flash('Admin access required.', 'error')
+        return redirect(url_for('home'))
+    spot = ParkingSpot.query.get_or_404(spot_id)
+    form = EditSpotNameForm()
+    if form.validate_on_submit():
+        old_name = spot.spot_number
+        new_name = form.spot_number.data.strip()
+        existing_spot = ParkingSpot.query.filter_by(
+            parking_lot_id=spot.parking_lot_id,
+            spot_number=new_name
+        ).filter(ParkingSpot.id != spot_id).first()
+        if existing_spot:
+            flash(f'Spot name "{new_name}" already exists in this parking lot. Please choose a different name.', 'error')
+        else:
+            spot.spot_number = new_name
+            stage_occupancy('rename', spot_id, new_name)
+            db.session.commit()
+            flash(f'Spot name updated from "{old_name}" to "{new_name}" successfully!', 'success')
+    else:
+        flash('Please enter a valid spot name (1-10 characters).', 'error')
+    return redirect(url_for('view_parking_spot', spot_id=spot_id))
+
+@route('/change-spot-status/<int:spot_id>', methods=['POST'])
+def change_spot_status(spot_id):
+    if 'email' not in session or not session.get('is_admin', False):
+        flash('Admin access required.', 'error')
+        return redirect(url_for('home'))
+    spot = ParkingSpot.query.get_or_404(spot_id)
+    form = ChangeSpotStatusForm()
+    if form.validate_on_submit():
+        old_status = "Occupied" if spot.is_occupied else "Available"
+        new_status_occupied = form.is_occupied.data
+        new_status = "Occupied" if new_status_occupied else "Available"
+        if spot.is_occupied and not new_status_occupied:
+            active_booking = Booking.query.filter_by(parking_spot_id=spot_id, status='active').first()
+            if active_booking:
+                active_booking.status = 'cancelled'
+                active_booking.release_time = datetime.utcnow()
+                record_closed_booking(active_booking)
+                forget_user_summary(active_booking.user_id)
+                flash(f'Active booking #{active_booking.id} has been cancelled due to status change.', 'warning')
+            free_spot(spot_id)
+        elif not spot.is_occupied and new_status_occupied:
+            if claim_spot(spot.parking_lot_id, spot_id) is None:
+                db.session.rollback()
+                flash(f'Spot {spot.spot_number} could not be marked occupied: it was just taken or is held for a reservation.', 'error')
+                return redirect(url_for('view_parking_spot', spot_id=spot_id))
+        db.session.commit()
+        if old_status != new_status:
+            flash(f'Spot {spot.spot_number} status changed from "{old_status}" to "{new_status}" successfully!', 'success')
+        else:
+            flash(f'Spot {spot.spot_number} status remains "{new_status}".', 'info')
+    else:
+        flash('Invalid form submission.', 'error')
+    return redirect(url_for('view_parking_spot', spot_id=spot_id))
+
+@route('/admin/users')
+def admin_users():
+    if 'email' not in session or not session.get('is_admin', False):
+        flash('Admin access required.', 'error')
+        return redirect(url_for('home'))
+    search_query = request.args.get('search', '').strip()
+    page, previous_cursor, next_cursor = user_page(
+        search_query,
+        after=request.args.get('after', type=int),
+        before=request.args.get('before', type=int)
+    )
+    users_data = []
+    for user, total_bookings, active_bookings in page:
+        users_data.append({
+            'id': user.id,
+            'fullname': user.fullname,
+            'email': user.email,
+            'phone': user.phone,
+            'address': user.address,
+            'pincode': user.pincode,
+            'total_bookings': total_bookings,
+            'active_bookings': active_bookings
+        })
+    search_args = {'search': search_query} if search_query else {}
+    pagination = {
+        'previous_url': url_for('admin_users', before=previous_cursor, **search_args) if previous_cursor else None,
+        'next_url': url_for('admin_users', after=next_cursor, **search_args) if next_cursor else None
+    }
+    return render_template('admin_users.html', users=users_data, email=session['email'],
+                         totals=user_totals(), search_query=search_query, pagination=pagination)
+
+def report_filter_form():
+    filter_form = ReportFilterForm(request.args)
+    filter_form.lot_id.choices = [('', 'All lots')] + [
+        (str(lot_id), name) for lot_id, name in db.session.query(ParkingLot.id, ParkingLot.name).order_by(ParkingLot.name)
+    ]
+    return filter_form
+
+def report_filters(filter_form):
+    return {
+        'lot_id': int(filter_form.lot_id.data) if filter_form.lot_id.data else None,
+        'user_email': (filter_form.user_email.data or '').strip(),
+        'status': filter_form.status.data,
+        'date_from': filter_form.date_from.data,
+        'date_to': filter_form.date_to.data
+    }
+
+@route('/admin/reports')
+def admin_reports():
+    if 'email' not in session or not session.get('is_admin', False):
+        flash('Admin access required.', 'error')
+        return redirect(url_for('home'))
+    filter_form = report_filter_form()
+    filters = {}
+    if filter_form.validate():
+        filters = report_filters(filter_form)
+    else:
+        flash('Invalid report filters, showing all bookings.', 'error')
+    conditions = booking_filters(**filters)
+    page, newer_cursor, older_cursor = booking_page(
+        conditions,
+        after=request.args.get('after'),
+        before=request.args.get('before')
+    )
+    bookings_data = []
+    for booking, user, spot, lot in page:
+        duration = "Ongoing"
+        if booking.booking_time:
+            end_time = booking.release_time if booking.release_time else datetime.now()
+            duration_delta = end_time - booking.booking_time
+            hours = int(duration_delta.total_seconds() / 3600)
+            minutes = int((duration_delta.total_seconds() % 3600) / 60)
+            duration = f"{hours}h {minutes}m"
+        bookings_data.append({
+            'id': booking.id,
+            'user_name': user.fullname,
+            'user_email': user.email,
+            'vehicle_number': booking.vehicle_number,
+            'lot_name': lot.name,
+            'spot_number': spot.spot_number,
+            'booking_time': booking.booking_time.strftime('%Y-%m-%d %H:%M'),
+            'release_time': booking.release_time.strftime('%Y-%m-%d %H:%M') if booking.release_time else 'Ongoing',
+            'duration': duration,
+            'status': booking.status,
+            'cost': booking.total_cost
+        })
+    stats = booking_totals(filters)
+    filter_args = {key: value for key, value in request.args.items() if key not in ('after', 'before') and value}
+    pagination = {
+        'newer_url': url_for('admin_reports', before=newer_cursor, **filter_args) if newer_cursor else None,
+        'older_url': url_for('admin_reports', after=older_cursor, **filter_args) if older_cursor else None,
+        'first_url': url_for('admin_reports', **filter_args)
+    }
+    return render_template('admin_reports.html', bookings=bookings_data, stats=stats, email=session['email'],
+                         filter_form=filter_form, pagination=pagination, filtered=bool(filter_args),
+                         export_args=filter_args)
+
+@route('/admin/occupancy-check')
+def occupancy_check():
+    if 'email' not in session or not session.get('is_admin', False):
+        flash('Admin access required.', 'error')
+        return redirect(url_for('home'))
+    problems = occupancy_index.check_consistency()
+    if problems and request.args.get('repair'):
+        occupancy_index.rebuild()
+    return jsonify({'consistent': not problems, 'problems': problems, 'repaired': bool(problems and request.args.get('repair'))})
+
+@route('/admin/events')
+def admin_events():
+    if 'email' not in session or not session.get('is_admin', False):
+        flash('Admin access required.', 'error')
+        return redirect(url_for('home'))
+    occupancy_index.ensure_loaded()
+    subscription = event_hub.subscribe(current_app.config['MAX_EVENT_STREAMS'])
+    if subscription is None:
+        return Response('Too many open event streams.', status=503, mimetype='text/plain', headers={'Retry-After': '30'})
+    app = current_app._get_current_object()
+
+    def refresh_occupancy():
+        with app.app_context():
+            occupancy_index.ensure_loaded()
+
+    response = Response(event_hub.stream(subscription, poll=refresh_occupancy), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    response.call_on_close(lambda: event_hub.unsubscribe(subscription))
+    return response
+
+def all_cache_stats():
+    stats = lot_cache_stats()
+    stats['user_summaries'] = user_summaries.stats()
+    stats['occupancy_series'] = occupancy_series.stats()
+    stats['spot_grid_fragments'] = spot_grid_fragments.stats()
+    return stats
+
+@route('/admin/cache-stats')
+def cache_stats():
+    if 'email' not in session or not session.get('is_admin', False):
+        flash('Admin access required.', 'error')
+        return redirect(url_for('home'))
+    return jsonify(all_cache_stats())
+
+@route('/admin/metrics')
+def admin_metrics():
+    if 'email' not in session or not session.get('is_admin', False):
+        flash('Admin access required.', 'error')
+        return redirect(url_for('home'))
+    if not current_app.config['INSTRUMENTATION']:
+        return Response('Instrumentation is disabled. Set PARKING_INSTRUMENTATION=1 to enable it.\n', status=404, mimetype='text/plain')
+    from instrumentation import prometheus_text
+    return Response(prometheus_text(all_cache_stats()), mimetype='text/plain; version=0.0.4')
+
+@route('/admin/reports/export')
+def export_bookings():
+    if 'email' not in session or not session.get('is_admin', False):
+        flash('Admin access required.', 'error')
+        return redirect(url_for('home'))
+    filter_form = report_filter_form()
+    export_format = request.args.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS or not filter_form.validate():
+        flash('Invalid export options.', 'error')
+        return redirect(url_for('admin_reports'))
+    compress = bool(request.args.get('gzip'))
+    filename = f"bookings-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}.{export_format}"
+    mimetype = EXPORT_FORMATS[export_format]
+    if compress:
+        filename += '.gz'
+        mimetype = 'application/gzip'
+    chunks = export_chunks(booking_filters(**report_filters(filter_form)), export_format, compress)
+    return Response(stream_with_context(chunks), mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename="{filename}"'})